@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ApiStoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api_store'
+
+    def ready(self):
+        from . import signals  # noqa: F401
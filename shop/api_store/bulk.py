@@ -0,0 +1,233 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+from shops.cache import invalidate_model_state
+from shops.models import Product
+from shops.search import get_search_engine
+
+
+class BulkRelatedField(serializers.PrimaryKeyRelatedField):
+    """Связь по первичному ключу; объекты загружаются BulkWriter одним запросом на пакет."""
+    objects = {}
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = self.objects.get(pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class BulkWriter:
+    """
+    Массовая запись через сериализатор модели. Строки обрабатываются пакетами
+    по chunk_size: связи и уникальные поля проверяются одним запросом на пакет,
+    изменения пишутся bulk_create/bulk_update в транзакции пакета.
+    Строки с ошибками пропускаются; результат возвращается по каждой строке.
+    post_save при этом не отправляется, поэтому поисковый индекс и updated_at
+    (по нему считается версия модели, shops.cache) обновляются здесь явно.
+    """
+
+    def __init__(self, serializer_class, context=None, chunk_size=500):
+        self.model = serializer_class.Meta.model
+        self.serializer_class = type(
+            f'Bulk{serializer_class.__name__}', (serializer_class,), {'serializer_related_field': BulkRelatedField}
+        )
+        self.context = context or {}
+        self.chunk_size = chunk_size
+
+    def create(self, rows):
+        return self.run(rows, self.create_chunk)
+
+    def update(self, rows):
+        return self.run(rows, self.update_chunk)
+
+    def save(self, rows):
+        """Строки с id обновляются, без id — создаются (импорт из файлов)."""
+        def save_chunk(chunk):
+            update = [(index, row) for index, row in chunk if isinstance(row, dict) and row.get('id') not in (None, '')]
+            create = [(index, row) for index, row in chunk if not isinstance(row, dict) or row.get('id') in (None, '')]
+            return (self.update_chunk(update) if update else []) + (self.create_chunk(create) if create else [])
+        return self.run(rows, save_chunk)
+
+    def delete(self, rows):
+        return self.run(rows, self.delete_chunk)
+
+    def run(self, rows, apply):
+        results, chunk = [], []
+        for index, row in enumerate(rows):
+            chunk.append((index, row))
+            if len(chunk) >= self.chunk_size:
+                results.extend(apply(chunk))
+                chunk = []
+        if chunk:
+            results.extend(apply(chunk))
+        # bulk_create/bulk_update не отправляют сигналов, запомненная версия сбрасывается здесь
+        invalidate_model_state(self.model._meta.model_name)
+        results.sort(key=lambda result: result['index'])
+        return results
+
+    def get_serializer(self, partial):
+        serializer = self.serializer_class(context=self.context, partial=partial)
+        # Уникальность проверяется на весь пакет (check_unique), а не запросом на строку.
+        unique_fields = []
+        for field in serializer.fields.values():
+            if not field.read_only and any(isinstance(v, UniqueValidator) for v in field.validators):
+                field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+                unique_fields.append(field)
+        return serializer, unique_fields
+
+    def prefetch_related(self, serializer, rows):
+        for field in serializer.fields.values():
+            if not isinstance(field, BulkRelatedField) or field.read_only:
+                continue
+            pks = set()
+            for row in rows:
+                try:
+                    pks.add(field.get_queryset().model._meta.pk.to_python(row.get(field.field_name)))
+                except (DjangoValidationError, TypeError, AttributeError):
+                    pass
+            pks.discard(None)
+            field.objects = field.get_queryset().in_bulk(pks)
+
+    def validate(self, chunk, instances=None):
+        serializer, unique_fields = self.get_serializer(partial=instances is not None)
+        self.prefetch_related(serializer, [row for _, row in chunk if isinstance(row, dict)])
+        items = []
+        for index, row in chunk:
+            item = {'index': index, 'instance': None, 'data': None, 'errors': None}
+            items.append(item)
+            if not isinstance(row, dict):
+                item['errors'] = {'non_field_errors': ['Ожидается объект.']}
+                continue
+            if instances is not None:
+                item['instance'] = instances.get(self.to_pk(row.get('id')))
+                if item['instance'] is None:
+                    item['errors'] = {'id': ['Объект не найден.']}
+                    continue
+            serializer.instance = item['instance']
+            try:
+                item['data'] = serializer.run_validation(row)
+            except serializers.ValidationError as e:
+                item['errors'] = e.detail
+        self.check_unique(items, unique_fields)
+        return items
+
+    def check_unique(self, items, unique_fields):
+        for field in unique_fields:
+            values = {item['data'][field.source] for item in items if not item['errors'] and field.source in item['data']}
+            taken = dict(
+                self.model._default_manager.filter(**{f'{field.source}__in': values}).values_list(field.source, 'pk')
+            )
+            for item in items:
+                if item['errors'] or field.source not in item['data']:
+                    continue
+                value = item['data'][field.source]
+                pk = item['instance'].pk if item['instance'] else None
+                if taken.get(value, pk) != pk:
+                    item['errors'] = {field.field_name: [str(UniqueValidator.message)]}
+                else:
+                    # Повтор значения дальше в пакете — тоже конфликт
+                    taken[value] = pk if pk is not None else object()
+
+    def to_pk(self, value):
+        try:
+            return self.model._meta.pk.to_python(value)
+        except DjangoValidationError:
+            return None
+
+    def create_chunk(self, chunk):
+        items = self.validate(chunk)
+        valid = [item for item in items if not item['errors']]
+        objs = [self.model(**item['data']) for item in valid]
+        if objs:
+            try:
+                with transaction.atomic():
+                    # auto_now/auto_now_add bulk_create заполняет сам
+                    self.model._default_manager.bulk_create(objs)
+                    self.update_search(objs)
+            except IntegrityError as e:
+                return self.results(items, 'created', failed=e)
+        for item, obj in zip(valid, objs):
+            item['instance'] = obj
+        return self.results(items, 'created')
+
+    def update_chunk(self, chunk):
+        pks = {self.to_pk(row.get('id')) for _, row in chunk if isinstance(row, dict)}
+        try:
+            with transaction.atomic():
+                instances = self.model._default_manager.select_for_update().in_bulk(pks - {None})
+                items = self.validate(chunk, instances)
+                objs, fields = {}, set()
+                for item in items:
+                    if item['errors']:
+                        continue
+                    for attr, value in item['data'].items():
+                        setattr(item['instance'], attr, value)
+                        fields.add(attr)
+                    objs[item['instance'].pk] = item['instance']
+                if objs and fields:
+                    # bulk_update не вызывает pre_save, auto_now заполняется явно
+                    now = timezone.now()
+                    for field in self.model._meta.concrete_fields:
+                        if getattr(field, 'auto_now', False):
+                            for obj in objs.values():
+                                setattr(obj, field.attname, now)
+                            fields.add(field.name)
+                    self.model._default_manager.bulk_update(objs.values(), fields)
+                    self.update_search(objs.values(), fields)
+        except IntegrityError as e:
+            return self.results(items, 'updated', failed=e)
+        return self.results(items, 'updated')
+
+    def delete_chunk(self, chunk):
+        items = []
+        for index, row in chunk:
+            pk = self.to_pk(row.get('id') if isinstance(row, dict) else row)
+            items.append({'index': index, 'pk': pk, 'errors': None if pk is not None else {'id': ['Некорректный id.']}})
+        pks = {item['pk'] for item in items if not item['errors']}
+        with transaction.atomic():
+            existing = set(self.model._default_manager.filter(pk__in=pks).values_list('pk', flat=True))
+            # Обычное удаление: каскады и post_delete (DeletionLog, версии) срабатывают как при DELETE по одному
+            self.model._default_manager.filter(pk__in=existing).delete()
+        results = []
+        for item in items:
+            if not item['errors'] and item['pk'] not in existing:
+                item['errors'] = {'id': ['Объект не найден.']}
+            results.append(self.result(item['index'], 'deleted', item['pk'], item['errors']))
+        return results
+
+    def update_search(self, objs, fields=None):
+        # То же, что shops.signals.update_search_vector, одним UPDATE на пакет
+        if self.model is Product and (fields is None or {'name', 'description'} & set(fields)):
+            get_search_engine().update(Product.objects.filter(pk__in=[obj.pk for obj in objs]))
+
+    def results(self, items, status, failed=None):
+        results = []
+        for item in items:
+            errors = item['errors']
+            if errors is None and failed is not None:
+                errors = {'non_field_errors': [str(failed)]}
+            pk = item['instance'].pk if item['instance'] is not None else None
+            results.append(self.result(item['index'], status, pk, errors))
+        return results
+
+    def result(self, index, status, pk, errors):
+        if errors:
+            return {'index': index, 'status': 'error', 'id': pk, 'errors': errors}
+        return {'index': index, 'status': status, 'id': pk}
+
+
+def bulk_summary(results):
+    summary = {'created': 0, 'updated': 0, 'deleted': 0, 'errors': 0}
+    for result in results:
+        summary['errors' if result['status'] == 'error' else result['status']] += 1
+    return summary
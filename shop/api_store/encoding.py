@@ -0,0 +1,61 @@
+import decimal
+import json
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # без orjson используется стандартный json
+    orjson = None
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    """Кодировщик DRF, но Decimal — строкой без экспоненты, как выводит DecimalField (а не float)."""
+
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return format(obj, 'f')
+        return super().default(obj)
+
+
+_encoder = JSONEncoder()
+
+
+def use_orjson():
+    # settings.API_JSON_BACKEND: 'orjson' (по умолчанию, если установлен) или 'json'
+    return orjson is not None and getattr(settings, 'API_JSON_BACKEND', 'orjson') == 'orjson' and api_settings.UNICODE_JSON
+
+
+def escape_separators(content):
+    # U+2028/U+2029 — как в JSONRenderer: часть клиентов считает их переводом строки
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+def dumps(data):
+    """
+    Компактный JSON (bytes) с теми же правилами, что у JSONRenderer DRF.
+    orjson кодирует datetime сам (RFC 3339, UTC — 'Z'), остальное, чего он
+    не знает (Decimal, ленивые строки, QuerySet), — через JSONEncoder.
+    """
+    if use_orjson():
+        try:
+            return escape_separators(orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS))
+        except orjson.JSONEncodeError:
+            pass  # например, int длиннее 64 бит — стандартный json справится
+    content = json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON, separators=(',', ':'),
+    )
+    return escape_separators(content.encode())
+
+
+def loads(content):
+    if use_orjson():
+        return orjson.loads(content)
+    return json.loads(content)
@@ -0,0 +1,77 @@
+import csv
+import tempfile
+from datetime import datetime
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+try:
+    import openpyxl
+except ImportError:  # XLSX-выгрузка необязательна
+    openpyxl = None
+
+EXPORT_TYPES = ('csv', 'xlsx')
+XLSX_MAX_ROWS = 1048576  # предел строк на листе Excel
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """Псевдо-файл для csv.writer: строка сразу возвращается генератору ответа."""
+
+    def write(self, value):
+        return value
+
+
+def export_value(value):
+    # Даты — в локальном часовом поясе и без tzinfo (openpyxl не принимает aware datetime).
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.make_naive(value)
+    # Текст от покупателей не должен стать формулой при открытии в Excel (=HYPERLINK(...) и т.п.)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def xlsx_max_rows():
+    return getattr(settings, 'XLSX_EXPORT_MAX_ROWS', 100000)
+
+
+def csv_response(headers, rows, filename):
+    writer = csv.writer(Echo())
+
+    def stream():
+        yield '\ufeff' + writer.writerow(headers)  # BOM — чтобы Excel открыл UTF-8 без вопросов
+        for row in rows:
+            yield writer.writerow([export_value(value) for value in row])
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_response(headers, rows, filename):
+    """
+    XLSX — zip-архив, его нельзя отдавать по мере формирования. Книга пишется
+    в режиме write_only (строки не копятся в памяти) во временный файл,
+    который затем отдается потоком. Число строк ограничивает вызывающий код
+    (xlsx_max_rows), размер файла в памяти — XLSX_EXPORT_SPOOL_SIZE.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet, count = None, XLSX_MAX_ROWS
+    for row in rows:
+        if count >= XLSX_MAX_ROWS:
+            sheet = workbook.create_sheet(f'{filename} {len(workbook.worksheets) + 1}')
+            sheet.append(headers)
+            count = 1
+        sheet.append([export_value(value) for value in row])
+        count += 1
+    if sheet is None:
+        workbook.create_sheet(filename).append(headers)
+    output = tempfile.SpooledTemporaryFile(max_size=getattr(settings, 'XLSX_EXPORT_SPOOL_SIZE', 10 * 1024 * 1024))
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output, as_attachment=True, filename=f'{filename}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
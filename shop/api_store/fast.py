@@ -0,0 +1,162 @@
+import decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
+from rest_framework import fields, relations, serializers
+from rest_framework.settings import api_settings
+
+# Поля, у которых значение из БД совпадает с to_representation
+IDENTITY_FIELDS = (
+    fields.IntegerField, fields.CharField, fields.BooleanField, fields.FloatField,
+    relations.PrimaryKeyRelatedField,
+)
+
+
+def decimal_converter(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.normalize_output or field.localize or not coerce_to_string:
+        return field.to_representation
+    quantum = decimal.Decimal('.1') ** field.decimal_places if field.decimal_places is not None else None
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        if quantum is not None:
+            value = value.quantize(quantum, rounding=rounding, context=context)
+        return '{:f}'.format(value)
+    return convert
+
+
+def datetime_converter(field, native=False):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != fields.ISO_8601 or tz is None:
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(tz)
+        if native:
+            # Строку ISO 8601 соберет рендерер (api_store.encoding) — тот же формат
+            return value
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def file_converter(field, model_field):
+    if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return lambda name: name or None
+    storage = model_field.storage
+    request = field.context.get('request')
+
+    def convert(name):
+        # Как FileField.to_representation, но без FieldFile на каждую строку
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    base_url = storage.base_url if isinstance(storage, FileSystemStorage) else None
+    if not base_url or not base_url.startswith('/') or not base_url.endswith('/'):
+        return convert
+    # Локальное хранилище: абсолютный префикс считается один раз на запрос.
+    # Результат тот же, что urljoin(base_url, ...) + build_absolute_uri, пока в пути
+    # нет сегментов '.', '..' и пустых — иначе общий путь.
+    prefix = request.build_absolute_uri(base_url) if request is not None else base_url
+
+    def convert_local(name):
+        if not name:
+            return None
+        path = filepath_to_uri(name).lstrip('/')
+        if '//' in path or '.' in path.split('/') or '..' in path.split('/'):
+            return convert(name)
+        return prefix + path
+    return convert_local
+
+
+def get_converter(field, model_field, native=False):
+    # None — значение выводится как есть
+    if isinstance(field, fields.DecimalField):
+        return decimal_converter(field)
+    if isinstance(field, fields.DateTimeField):
+        return datetime_converter(field, native)
+    if isinstance(field, fields.FileField):
+        return file_converter(field, model_field) if model_field is not None else field.to_representation
+    if isinstance(field, fields.ReadOnlyField):
+        return None
+    if isinstance(field, IDENTITY_FIELDS) and not getattr(field, 'pk_field', None):
+        return None
+    return field.to_representation
+
+
+class RowSerializer:
+    """
+    Быстрый путь чтения для сериализатора модели: queryset читается через
+    values(), строка превращается в словарь заранее подобранными функциями
+    по каждому полю — без экземпляров моделей и обхода полей ModelSerializer
+    на каждую строку. Вывод совпадает с serializer.data.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def to_representation(self, row):
+        return {
+            key: value if (value := row[lookup]) is None or converter is None else converter(value)
+            for key, lookup, converter in self.columns
+        }
+
+    def values(self, queryset, extra=()):
+        # extra — столбцы, нужные не для вывода, а, например, для курсора пагинации.
+        # Первичный ключ выбирается всегда: без обычных столбцов (?fields=total — только
+        # агрегат) COUNT(*) пагинатора строит подзапрос с пустым SELECT.
+        # prefetch_related к словарям values() неприменим.
+        pk = queryset.model._meta.pk.attname
+        lookups = dict.fromkeys([pk] + [lookup for _, lookup, _ in self.columns] + list(extra))
+        return queryset.prefetch_related(None).values(*lookups)
+
+    def iterate(self, queryset, chunk_size=2000):
+        for row in self.values(queryset).iterator(chunk_size=chunk_size):
+            yield self.to_representation(row)
+
+
+def compile_serializer(serializer, queryset, native=False):
+    """
+    RowSerializer для сериализатора (уже с учетом ?fields= и ?expand=) или None,
+    если какое-то поле так не вывести: вложенные сериализаторы, SerializerMethodField,
+    ModelField, source с точкой или '*', свойства модели.
+    native=True — datetime не переводятся в строку, их кодирует рендерер
+    (у рендерера native_types, см. api_store.renderers).
+    """
+    model = queryset.model
+    annotations = queryset.query.annotations
+    columns = []
+    for field in serializer._readable_fields:
+        source = field.source
+        if (
+            source == '*' or '.' in source
+            or isinstance(field, (
+                serializers.BaseSerializer, fields.SerializerMethodField, fields.ModelField, relations.ManyRelatedField,
+            ))
+            or (isinstance(field, relations.RelatedField) and not isinstance(field, relations.PrimaryKeyRelatedField))
+        ):
+            return None
+        model_field = None
+        if source not in annotations:
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                if hasattr(model, source) or not field.read_only:
+                    return None
+                continue  # как SkipField: аннотации нет (см. OrderSerializer.total)
+            if not model_field.concrete or model_field.many_to_many:
+                return None
+        columns.append((field.field_name, source, get_converter(field, model_field, native)))
+    return RowSerializer(columns)
@@ -0,0 +1,34 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class FieldFilterBackend(BaseFilterBackend):
+    """
+    Фильтрация по разрешенным параметрам запроса.
+    Во viewset задается filter_fields = {'параметр': 'lookup'}, например
+    {'slug': 'slug', 'ids': 'id__in'}. Lookup с суффиксом __in принимает
+    значения через запятую (не более view.max_filter_values).
+    """
+    max_filter_values = 500
+
+    def filter_queryset(self, request, queryset, view):
+        filter_fields = getattr(view, 'filter_fields', {})
+        for param, lookup in filter_fields.items():
+            value = request.query_params.get(param, None)
+            if value is None or value == '':
+                continue
+            if lookup.endswith('__in'):
+                value = self.split_values(param, value, view)
+            try:
+                queryset = queryset.filter(**{lookup: value})
+            except (ValueError, TypeError, DjangoValidationError):
+                raise ValidationError({param: f'Некорректное значение: {value}'})
+        return queryset
+
+    def split_values(self, param, value, view):
+        values = list(dict.fromkeys(item.strip() for item in value.split(',') if item.strip()))
+        limit = getattr(view, 'max_filter_values', self.max_filter_values)
+        if len(values) > limit:
+            raise ValidationError({param: f'Не более {limit} значений за запрос.'})
+        return values
@@ -0,0 +1,446 @@
+import base64
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Max, Prefetch, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from rest_framework.decorators import action
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from shops.cache import get_version
+from shops.models import DeletionLog
+
+from .bulk import BulkWriter, bulk_summary
+from .export import EXPORT_TYPES, csv_response, openpyxl, xlsx_max_rows, xlsx_response
+from .fast import compile_serializer
+from .pagination import CustomCursorPagination
+from .parsers import FastJSONParser, NDJSONParser
+from .permissions import IsStaffRole
+from .renderers import NDJSONRenderer, dumps_line
+
+# Порядок миксинов во viewset важен: list() проходит цепочку super() слева направо.
+#   ConditionalGetMixin  — первым из list-миксинов: 304 до любой выборки;
+#   NDJSONMixin          — перед FastListMixin: поток без пагинации;
+#   FastListMixin        — values() и RowSerializer, иначе обычный list();
+#   CursorPaginationMixin — последним перед ModelViewSet: задает paginator.
+# BulkMixin, ExportMixin, ChoicesMixin, ChangesMixin добавляют отдельные action,
+# ExpandMixin и SparseFieldsMixin — get_queryset/контекст; их место в списке
+# не важно, по соглашению они левее list-миксинов. Порядок проверяет
+# api_store.tests.MixinOrderTests.
+
+
+class CursorPaginationMixin:
+    """
+    Включает курсорную пагинацию по запросу: ?pagination=cursor или ?cursor=...
+    Без этих параметров используется обычная постраничная пагинация.
+    """
+    cursor_ordering = ('id',)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = CustomCursorPagination(ordering=self.cursor_ordering)
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+
+class NDJSONMixin:
+    """
+    Потоковый список: Accept: application/x-ndjson или ?format=ndjson.
+    Весь отфильтрованный queryset отдается одним ответом, строка за строкой,
+    без пагинации и COUNT; строки читаются курсором на стороне сервера
+    (iterator), память не зависит от размера выборки. Если сериализатор
+    позволяет, строки собираются из values_list() (api_store.fast),
+    иначе — обычным сериализатором.
+    """
+    ndjson_chunk_size = 2000
+    ndjson_buffer_rows = 200  # строк в одном фрагменте ответа
+
+    def get_renderers(self):
+        return super().get_renderers() + [NDJSONRenderer()]
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != NDJSONRenderer.format:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        fast = compile_serializer(serializer, queryset, native=True)
+        if fast is not None:
+            rows = fast.iterate(queryset, self.ndjson_chunk_size)
+        else:
+            rows = (serializer.to_representation(obj) for obj in queryset.iterator(chunk_size=self.ndjson_chunk_size))
+        return StreamingHttpResponse(self.stream_ndjson(rows), content_type=NDJSONRenderer.media_type)
+
+    def stream_ndjson(self, rows):
+        buffer = []
+        for row in rows:
+            buffer.append(dumps_line(row))
+            if len(buffer) >= self.ndjson_buffer_rows:
+                yield b''.join(buffer)
+                buffer = []
+        if buffer:
+            yield b''.join(buffer)
+
+
+class FastListMixin:
+    """
+    list() через api_store.fast: страница читается values() и собирается
+    RowSerializer вместо ModelSerializer(many=True) — без экземпляров моделей
+    и to_representation каждого поля. Ответ тот же; если сериализатор так
+    не вывести (например, ?expand=), используется обычный путь.
+    """
+    fast_list = True
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        fast = None
+        if self.fast_list:
+            native = getattr(request.accepted_renderer, 'native_types', False)
+            fast = compile_serializer(self.get_serializer(), queryset, native=native)
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+        # Курсорной пагинации нужны значения полей сортировки последней строки
+        extra = ()
+        if isinstance(self.paginator, CursorPagination):
+            extra = [name.lstrip('-') for name in self.paginator.get_ordering(request, queryset, self)]
+        rows = fast.values(queryset, extra=extra)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([fast.to_representation(row) for row in page])
+        return Response([fast.to_representation(row) for row in rows])
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET для list и retrieve: ETag строится из версий моделей (shops.cache —
+    по updated_at и DeletionLog в БД, поэтому одинаков во всех процессах)
+    и параметров запроса. При совпадении If-None-Match ответ 304 отдается
+    до выборки и сериализации.
+    По умолчанию используется версия модели queryset; если ответ зависит
+    от других моделей, их имена перечисляются в etag_versions.
+    """
+    etag_versions = None
+
+    def get_etag_versions(self):
+        return self.etag_versions or (self.queryset.model._meta.model_name,)
+
+    def get_etag(self, request):
+        versions = get_version(*self.get_etag_versions())
+        # Хост — из-за абсолютных URL изображений, формат — из-за Browsable API.
+        raw = f'{versions}:{request.get_host()}:{request.get_full_path()}:{request.accepted_renderer.format}'
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class ChangesMixin:
+    """
+    Инкрементальная синхронизация: GET <endpoint>/changes/?since=<cursor>
+    возвращает строки, измененные после курсора (по updated_at, id), и id
+    удаленных объектов из DeletionLog. Без since отдается полная выгрузка
+    порциями. Клиент повторяет запрос с курсором из ответа, пока has_more.
+    Строки моложе changes_lag секунд не отдаются: транзакция, начатая раньше,
+    могла еще не зафиксировать изменение с меньшим updated_at. Журнал удалений
+    хранится DELETION_LOG_RETENTION_DAYS (prune_deletion_log) — клиент, не
+    синхронизировавшийся дольше, должен заново запросить полную выгрузку.
+    """
+    changes_page_size = 500
+    changes_lag = 2
+
+    @action(detail=False)
+    def changes(self, request):
+        since = request.query_params.get('since')
+        model = self.queryset.model
+        model_name = model._meta.model_name
+        horizon = timezone.now() - timedelta(seconds=self.changes_lag)
+        if since:
+            updated_at, last_id, last_deletion = decode_changes_cursor(since)
+        else:
+            updated_at = last_id = None
+            last_deletion = DeletionLog.objects.filter(model=model_name).aggregate(last=Max('id'))['last'] or 0
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', self.changes_page_size)), self.changes_page_size))
+        except ValueError:
+            limit = self.changes_page_size
+
+        queryset = self.filter_queryset(model._default_manager.all()).filter(updated_at__lte=horizon)
+        if updated_at is not None:
+            queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=last_id))
+        rows = list(queryset.order_by('updated_at', 'id')[:limit + 1])
+        deleted = list(
+            DeletionLog.objects.filter(model=model_name, id__gt=last_deletion, deleted_at__lte=horizon)
+            .order_by('id').values_list('id', 'object_id')[:limit + 1]
+        )
+        has_more = len(rows) > limit or len(deleted) > limit
+        rows, deleted = rows[:limit], deleted[:limit]
+        if rows:
+            updated_at, last_id = rows[-1].updated_at, rows[-1].id
+        if deleted:
+            last_deletion = deleted[-1][0]
+        return Response({
+            'results': self.get_serializer(rows, many=True).data,
+            'deleted': [object_id for _, object_id in deleted],
+            'cursor': encode_changes_cursor(updated_at, last_id, last_deletion),
+            'has_more': has_more,
+        })
+
+
+def encode_changes_cursor(updated_at, last_id, last_deletion):
+    payload = [updated_at.isoformat() if updated_at else None, last_id, last_deletion]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_changes_cursor(cursor):
+    try:
+        updated_at, last_id, last_deletion = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if updated_at is not None:
+            updated_at = datetime.fromisoformat(updated_at)
+        return updated_at, int(last_id or 0), int(last_deletion)
+    except (ValueError, TypeError):
+        raise ValidationError({'since': 'Некорректный курсор.'})
+
+
+def parse_expand(value):
+    # 'items,items.product,customer' -> {'items': {'product': {}}, 'customer': {}}
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in filter(None, path.strip().split('.')):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class ExpandMixin:
+    """
+    ?expand= для viewset с ExpandableSerializerMixin: проверяет запрошенные связи
+    и загружает их prefetch_related — по одному запросу на связь, независимо
+    от числа строк на странице и размера заказов.
+    """
+
+    def get_expand(self):
+        if not hasattr(self, '_expand'):
+            self._expand = parse_expand(self.request.query_params.get('expand'))
+            self.validate_expand(self._expand, self.get_serializer_class())
+        return self._expand
+
+    def validate_expand(self, tree, serializer_class, prefix=''):
+        expandable_fields = getattr(serializer_class, 'expandable_fields', {})
+        for name, subtree in tree.items():
+            if name not in expandable_fields:
+                raise ValidationError({'expand': f'Недопустимое значение: {prefix}{name}'})
+            nested_class, _ = serializer_class.get_expandable_field(name)
+            self.validate_expand(subtree, nested_class, f'{prefix}{name}.')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
+    def get_queryset(self):
+        return prefetch_expand(super().get_queryset(), self.get_expand())
+
+
+def prefetch_expand(queryset, tree):
+    lookups = []
+    for name, subtree in tree.items():
+        field = queryset.model._meta.get_field(name)
+        related = prefetch_expand(field.related_model._default_manager.all(), subtree)
+        if field.one_to_many:
+            related = related.order_by('id')
+        lookups.append(Prefetch(name, queryset=related))
+    return queryset.prefetch_related(*lookups) if lookups else queryset
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=id,name для GET: сериализатор (DynamicFieldsMixin) выводит только
+    эти поля, а queryset читает из БД только соответствующие столбцы (.only()).
+    """
+
+    def get_sparse_fields(self):
+        if self.request is None or self.request.method not in ('GET', 'HEAD'):
+            return None
+        value = self.request.query_params.get('fields')
+        if not value:
+            return None
+        return list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_sparse_fields()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if not fields:
+            return queryset
+        # Поля курсорной пагинации нужны для построения ссылок next/previous,
+        # внешние ключи связей из ?expand= — для prefetch_related.
+        names = fields + [name.lstrip('-') for name in getattr(self, 'cursor_ordering', ())]
+        names += list(parse_expand(self.request.query_params.get('expand')))
+        columns = []
+        for name in names:
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue  # аннотации и обратные связи; неизвестные имена отклонит сериализатор
+            if field.concrete:
+                columns.append(name)
+        return queryset.only(*columns)
+
+
+class ChoicesMixin:
+    """
+    Легкие списки для форм.
+    choices/ — полный список [{'id', 'label'}] из общего кэша; ключ содержит версию
+    модели, поэтому любая запись делает его устаревшим.
+    autocomplete/?q= — первые choices_limit совпадений по префиксу слов
+    (для больших таблиц вместо полного списка); autocomplete/?ids=1,2 — подписи
+    для уже выбранных значений.
+    """
+    choice_label_fields = ('name',)
+    autocomplete_fields = ('name',)
+    choices_limit = 20
+
+    def get_choice_queryset(self):
+        return self.queryset.model._default_manager.order_by(*self.choice_label_fields, 'id')
+
+    def serialize_choices(self, queryset):
+        return [
+            {'id': row[0], 'label': ' '.join(str(value) for value in row[1:] if value)}
+            for row in queryset.values_list('id', *self.choice_label_fields)
+        ]
+
+    def filter_autocomplete(self, queryset, query):
+        for term in query.split():
+            condition = Q()
+            for field in self.autocomplete_fields:
+                condition |= Q(**{f'{field}__istartswith': term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    @action(detail=False)
+    def choices(self, request):
+        model_name = self.queryset.model._meta.model_name
+        key = f'choices:{model_name}:{get_version(model_name)}'
+        data = cache.get(key)
+        if data is None:
+            data = self.serialize_choices(self.get_choice_queryset())
+            cache.set(key, data, getattr(settings, 'CHOICES_CACHE_TIMEOUT', 3600))
+        return Response(data)
+
+    @action(detail=False)
+    def autocomplete(self, request):
+        queryset = self.get_choice_queryset()
+        if request.query_params.get('ids'):
+            ids = [item.strip() for item in request.query_params['ids'].split(',')[:self.choices_limit]]
+            # Ошибка приведения типа в filter() возникла бы только при выполнении запроса (500)
+            if not all(item.isdigit() for item in ids):
+                raise ValidationError({'ids': 'Некорректное значение.'})
+            queryset = queryset.filter(id__in=ids)
+        else:
+            query = request.query_params.get('q', '').strip()
+            if not query:
+                return Response([])
+            queryset = self.filter_autocomplete(queryset, query)
+        return Response(self.serialize_choices(queryset[:self.choices_limit]))
+
+
+class ExportMixin:
+    """
+    Выгрузка без пагинации: <endpoint>/export/?type=csv|xlsx с теми же фильтрами,
+    что и у списка. Строки читаются values_list().iterator(chunk_size), поэтому
+    память не зависит от размера таблицы; XLSX ограничен XLSX_EXPORT_MAX_ROWS. export_fields = [(заголовок, lookup)].
+    Доступна только сотрудникам, даже если список открыт всем.
+    """
+    export_fields = ()
+    export_chunk_size = 2000
+
+    def get_export_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    @action(detail=False)
+    def export(self, request):
+        for permission in (IsAuthenticated(), IsStaffRole()):
+            if not permission.has_permission(request, self):
+                self.permission_denied(request, message=getattr(permission, 'message', None))
+        # ?format занят DRF (выбор рендерера), поэтому тип файла — ?type.
+        export_type = request.query_params.get('type', 'csv')
+        if export_type not in EXPORT_TYPES:
+            raise ValidationError({'type': f"Допустимые значения: {', '.join(EXPORT_TYPES)}"})
+        if export_type == 'xlsx' and openpyxl is None:
+            raise ValidationError({'type': 'Выгрузка в XLSX недоступна: не установлен openpyxl.'})
+        queryset = self.get_export_queryset()
+        # XLSX собирается целиком до отправки, поэтому его объем ограничен; CSV идет потоком.
+        if export_type == 'xlsx' and queryset.count() > xlsx_max_rows():
+            raise ValidationError({'type': f'В XLSX выгружается не более {xlsx_max_rows()} строк, используйте type=csv.'})
+        headers = [header for header, _ in self.export_fields]
+        rows = queryset.values_list(
+            *[lookup for _, lookup in self.export_fields]
+        ).iterator(chunk_size=self.export_chunk_size)
+        filename = self.basename
+        if export_type == 'xlsx':
+            return xlsx_response(headers, rows, filename)
+        return csv_response(headers, rows, filename)
+
+
+class BulkMixin:
+    """
+    Массовые операции: <endpoint>/bulk/ принимает JSON-массив или NDJSON
+    (Content-Type: application/x-ndjson). POST создает записи, PATCH частично
+    обновляет записи по id, DELETE удаляет по списку id (или объектов с id).
+    Запись — api_store.bulk.BulkWriter; ответ содержит итоги и результат
+    по каждой строке, при ошибках в части строк — статус 207. Права — те же,
+    что у одиночных операций: POST доступен роли ViewAndCreate (IsStaffRole).
+    """
+    bulk_chunk_size = 500
+
+    def get_bulk_writer(self):
+        return BulkWriter(self.get_serializer_class(), context=self.get_serializer_context(), chunk_size=self.bulk_chunk_size)
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], parser_classes=[FastJSONParser, NDJSONParser])
+    def bulk(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError({'non_field_errors': ['Ожидается список записей.']})
+        writer = self.get_bulk_writer()
+        operation = {'POST': writer.create, 'PATCH': writer.update, 'DELETE': writer.delete}[request.method]
+        results = operation(rows)
+        summary = bulk_summary(results)
+        if summary['errors']:
+            response_status = status.HTTP_207_MULTI_STATUS
+        elif request.method == 'POST':
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_200_OK
+        return Response(dict(summary, results=results), status=response_status)
@@ -1,6 +1,49 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.db import connections
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
 
 class CustomPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+class CustomCursorPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация: без COUNT(*) и OFFSET, стоимость страницы
+    не зависит от ее глубины. Порядок задается атрибутом cursor_ordering viewset.
+    С ?count=approx в ответ добавляется оценка числа строк по статистике планировщика.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def __init__(self, ordering=('id',)):
+        self.ordering = ordering
+        self.count = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get('count') == 'approx':
+            self.count = estimate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+        if self.count is not None:
+            response['count'] = self.count
+        response['results'] = data
+        return Response(response)
+
+def estimate_count(queryset):
+    # На PostgreSQL — оценка строк из плана запроса (EXPLAIN), без сканирования таблицы.
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
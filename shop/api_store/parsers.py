@@ -0,0 +1,35 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .encoding import loads
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser на api_store.encoding (orjson, если установлен)."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        content = stream.read()
+        if encoding.lower().replace('-', '') != 'utf8':
+            content = content.decode(encoding)
+        try:
+            return loads(content)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class NDJSONParser(BaseParser):
+    """Построчный JSON (application/x-ndjson): одна запись на строку."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        rows = []
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(loads(line))
+            except ValueError as e:
+                raise ParseError(f'Строка {number}: {e}')
+        return rows
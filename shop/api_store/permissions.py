@@ -1,31 +1,46 @@
 from rest_framework import permissions
 
-class IsViewAndEditOnly(permissions.BasePermission):
-    def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        if request.method in permissions.SAFE_METHODS:  # GET, HEAD, OPTIONS
-            return request.user.groups.filter(name='ViewAndEdit').exists()
-        if request.method in ['PATCH', 'PUT']:
-            return request.user.groups.filter(name='ViewAndEdit').exists()
-        return False
 
-class IsViewAndDeleteOnly(permissions.BasePermission):
-    def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        if request.method in permissions.SAFE_METHODS:
-            return request.user.groups.filter(name='ViewAndDelete').exists()
-        if request.method == 'DELETE':
-            return request.user.groups.filter(name='ViewAndDelete').exists()
-        return False
+def get_user_groups(request):
+    """
+    Имена групп пользователя, один запрос на весь запрос API: все проверки
+    составных прав (IsStaffRole) используют один набор. Между запросами
+    не кэшируется — исключение из группы действует сразу во всех процессах.
+    """
+    group_names = getattr(request, '_group_names', None)
+    if group_names is None:
+        group_names = frozenset(request.user.groups.values_list('name', flat=True))
+        request._group_names = group_names
+    return group_names
+
+
+class GroupPermission(permissions.BasePermission):
+    group_name = None
+    allowed_methods = ()
 
-class IsViewAndDeleteOnlyRole3(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        if request.method in permissions.SAFE_METHODS:
-            return request.user.groups.filter(name='ViewAndDeleteRole3').exists()
-        if request.method == 'DELETE':
-            return request.user.groups.filter(name='ViewAndDeleteRole3').exists()
-        return False
\ No newline at end of file
+        if request.method not in permissions.SAFE_METHODS and request.method not in self.allowed_methods:
+            return False
+        return self.group_name in get_user_groups(request)
+
+class IsViewAndEditOnly(GroupPermission):
+    group_name = 'ViewAndEdit'
+    allowed_methods = ('PATCH', 'PUT')
+
+class IsViewAndCreateOnly(GroupPermission):
+    # Создание записей: POST списка и <endpoint>/bulk/ (BulkMixin)
+    group_name = 'ViewAndCreate'
+    allowed_methods = ('POST',)
+
+class IsViewAndDeleteOnly(GroupPermission):
+    group_name = 'ViewAndDelete'
+    allowed_methods = ('DELETE',)
+
+class IsViewAndDeleteOnlyRole3(GroupPermission):
+    group_name = 'ViewAndDeleteRole3'
+    allowed_methods = ('DELETE',)
+
+# Любая из ролей; составной класс DRF, вызывается как обычный класс прав
+IsStaffRole = IsViewAndEditOnly | IsViewAndCreateOnly | IsViewAndDeleteOnly | IsViewAndDeleteOnlyRole3
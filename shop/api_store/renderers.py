@@ -0,0 +1,43 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .encoding import JSONEncoder, dumps
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на api_store.encoding (orjson, если установлен).
+    native_types: datetime можно отдавать без перевода в строку —
+    RowSerializer (api_store.fast) так и делает. Ответ с отступами
+    (Browsable API, ; indent=) строится JSONRenderer с тем же кодировщиком.
+    """
+    encoder_class = JSONEncoder
+    native_types = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+def dumps_line(data):
+    return dumps(data) + b'\n'
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    application/x-ndjson (?format=ndjson): один JSON-объект на строку.
+    Списки api_store отдаются потоком (NDJSONMixin), сюда попадают
+    остальные ответы — объект или список целиком.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+    native_types = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return b''.join(dumps_line(row) for row in rows)
@@ -4,23 +4,69 @@ from django.contrib.auth.models import User
 from rest_framework import serializers
 from shops.models import Category, Product, Manufacturer, Customer, Order, OrderItem, Review
 from django.contrib.auth.models import User
+from django.utils.module_loading import import_string
 
-class CategorySerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Выборочные поля по ?fields=id,name (api_store.mixins.SparseFieldsMixin передает
+    их через контекст). Применяется только к сериализатору верхнего уровня;
+    неизвестные имена полей — ошибка 400.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            fields = self.context.get('fields')
+        if fields:
+            unknown = [name for name in fields if name not in self.fields]
+            if unknown:
+                raise serializers.ValidationError({'fields': f"Неизвестные поля: {', '.join(unknown)}"})
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class ExpandableSerializerMixin:
+    """
+    Вложенные представления связей по ?expand=items,items.product,customer.
+    expandable_fields = {'поле': ('ИмяСериализатора', {kwargs})}; имя связи модели
+    совпадает с именем поля. Дерево expand передается через контекст
+    (api_store.mixins.ExpandMixin), вложенным сериализаторам — аргументом expand.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if expand is None:
+            expand = self.context.get('expand', {})
+        for name, subtree in expand.items():
+            if name in self.expandable_fields:
+                serializer_class, field_kwargs = self.get_expandable_field(name)
+                if issubclass(serializer_class, ExpandableSerializerMixin):
+                    field_kwargs = dict(field_kwargs, expand=subtree)
+                self.fields[name] = serializer_class(read_only=True, **field_kwargs)
+
+    @classmethod
+    def get_expandable_field(cls, name):
+        serializer_class, field_kwargs = cls.expandable_fields[name]
+        if isinstance(serializer_class, str):
+            serializer_class = import_string(f'{cls.__module__}.{serializer_class}')
+        return serializer_class, field_kwargs
+
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'image']
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = ['id', 'name', 'slug', 'description', 'price', 'stock', 'category', 'manufacturer', 'main_image']  # Исправлено 'image' на 'main_image'
 
-class ManufacturerSerializer(serializers.ModelSerializer):
+class ManufacturerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Manufacturer
         fields = ['id', 'name', 'country']  # Исправлено 'description' на 'country'
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
 
     class Meta:
@@ -35,17 +81,43 @@ class CustomerSerializer(serializers.ModelSerializer):
         print("CustomerSerializer: Creating with validated data:", validated_data)
         return super().create(validated_data)
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(DynamicFieldsMixin, ExpandableSerializerMixin, serializers.ModelSerializer):
+    # Сумма заказа считается в БД (OrderViewSet.get_queryset); без аннотации поле не выводится.
+    total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    expandable_fields = {
+        'customer': ('CustomerSerializer', {}),
+        'items': ('OrderItemSerializer', {'many': True}),
+    }
+
     class Meta:
         model = Order
-        fields = ['id', 'customer', 'status', 'created_at']
+        fields = ['id', 'customer', 'status', 'created_at', 'total']
+
+class OrderItemSerializer(DynamicFieldsMixin, ExpandableSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        'order': ('OrderSerializer', {}),
+        'product': ('ProductSerializer', {}),
+    }
 
-class OrderItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = ['id', 'order', 'product', 'quantity', 'price']
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Review
-        fields = ['id', 'product', 'user', 'rating', 'comment', 'created_at']
\ No newline at end of file
+        fields = ['id', 'product', 'customer', 'rating', 'comment', 'created_at']
+
+class CheckoutItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+class CheckoutSerializer(serializers.Serializer):
+    items = CheckoutItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        # Повторяющиеся товары объединяются: {product_id: quantity}
+        quantities = {}
+        for item in items:
+            quantities[item['product']] = quantities.get(item['product'], 0) + item['quantity']
+        return quantities
\ No newline at end of file
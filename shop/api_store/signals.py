@@ -0,0 +1,19 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+
+
+def invalidate_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+def invalidate_user_tokens(sender, instance, **kwargs):
+    # Смена is_active, пароля, прав и т.п. — пользователь перечитывается из БД.
+    token_cache.invalidate_user(instance.pk)
+
+
+post_delete.connect(invalidate_token, sender=Token, dispatch_uid='invalidate_cached_token')
+post_save.connect(invalidate_user_tokens, sender=User, dispatch_uid='invalidate_cached_user_tokens')
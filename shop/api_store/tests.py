@@ -1,3 +1,652 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import threading
+import unittest
+from unittest import mock
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from shops.models import Category, Customer, DeletionLog, Manufacturer, Order, OrderItem, Product
+from shops.services import CheckoutError, place_order
+from shops.cache import get_version
+from shops.tests import count_queries, create_rows, expire_model_state
+
+from .authentication import TokenCache, token_cache
+from . import encoding
+from .export import openpyxl
+from .mixins import ConditionalGetMixin, CursorPaginationMixin, FastListMixin, NDJSONMixin
+from . import views
+
+
+def create_catalogue(products=3):
+    category = Category.objects.create(name='Хлеб', slug='bread')
+    manufacturer = Manufacturer.objects.create(name='Пекарня', country='RU')
+    for i in range(products):
+        Product.objects.create(
+            name=f'Товар {i}', slug=f'product-{i}', description='Описание', price=Decimal('10.50') + i,
+            stock=10, category=category, manufacturer=manufacturer,
+        )
+    return category, manufacturer
+
+
+def create_staff(username='staff', group='ViewAndEdit', **kwargs):
+    user = User.objects.create_user(username, password='pass12345', is_staff=True, **kwargs)
+    if group:
+        user.groups.add(Group.objects.get_or_create(name=group)[0])
+    return user
+
+
+class ApiTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='testserver')
+
+
+class GroupPermissionTests(ApiTestCase):
+    def test_removed_group_is_denied_on_next_request(self):
+        create_catalogue(1)
+        user = create_staff()
+        self.client.force_authenticate(user)
+        product = Product.objects.get()
+        response = self.client.patch(f'/api/products/{product.id}/', {'stock': 5}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        user.groups.clear()
+        response = self.client.patch(f'/api/products/{product.id}/', {'stock': 6}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_role_allows_only_its_methods(self):
+        create_catalogue(1)
+        self.client.force_authenticate(create_staff(group='ViewAndDelete'))
+        product = Product.objects.get()
+        response = self.client.patch(f'/api/products/{product.id}/', {'stock': 5}, format='json')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.delete(f'/api/products/{product.id}/')
+        self.assertEqual(response.status_code, 204)
+
+
+class TokenAuthenticationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+        self.user = create_staff()
+
+    def login(self):
+        response = self.client.post('/api/auth/login/', {'username': 'staff', 'password': 'pass12345'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['token']
+
+    def test_logout_revokes_cached_token(self):
+        token = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(self.client.get('/api/customers/').status_code, 200)
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.assertFalse(Token.objects.filter(key=token).exists())
+        self.assertEqual(self.client.get('/api/customers/').status_code, 401)
+
+    def test_cached_token_skips_database(self):
+        token = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.client.get('/api/categories/choices/')
+        # Попадание в кэш токенов: ни authtoken_token, ни auth_user не читаются
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/categories/choices/').status_code, 200)
+        tables = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('authtoken_token', tables)
+        self.assertNotIn('auth_user', tables)
+
+    def test_zero_ttl_disables_cache(self):
+        cache = TokenCache(ttl=0)
+        cache.set('key', (self.user, None))
+        self.assertIsNone(cache.get('key'))
+
+
+class ConditionalGetTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        create_catalogue()
+
+    def get_etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        return response['ETag']
+
+    def assertModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def test_queryset_update_changes_etag(self):
+        etag = self.get_etag('/api/products/')
+        Product.objects.update(stock=1, updated_at=timezone.now())
+        expire_model_state()
+        response = self.assertModified('/api/products/', etag)
+        self.assertEqual({row['stock'] for row in response.json()['results']}, {1})
+
+    def test_detail_etag(self):
+        product = Product.objects.first()
+        url = f'/api/products/{product.id}/'
+        etag = self.get_etag(url)
+        product.name = 'Новое имя'
+        product.save()
+        self.assertEqual(self.assertModified(url, etag).json()['name'], 'Новое имя')
+
+    def test_deletion_changes_etag(self):
+        etag = self.get_etag('/api/products/')
+        Product.objects.filter(pk=Product.objects.last().pk).delete()
+        self.assertEqual(self.assertModified('/api/products/', etag).json()['count'], 2)
+
+    def test_bulk_update_changes_etag(self):
+        self.client.force_authenticate(create_staff())
+        etag = self.get_etag('/api/products/')
+        rows = [{'id': product.id, 'stock': 3} for product in Product.objects.all()]
+        self.assertEqual(self.client.patch('/api/products/bulk/', rows, format='json').status_code, 200)
+        self.assertModified('/api/products/', etag)
+
+    def test_checkout_changes_etag(self):
+        etag = self.get_etag('/api/products/')
+        customer = Customer.objects.create(first_name='Покупатель', email='buyer@example.com')
+        place_order(customer, {Product.objects.first().id: 1})
+        self.assertModified('/api/products/', etag)
+
+    def test_version_memoized(self):
+        get_version('orderitem', 'product')
+        with self.assertNumQueries(0):
+            get_version('orderitem', 'product')
+        with self.settings(MODEL_STATE_TIMEOUT=0), self.assertNumQueries(4):
+            get_version('orderitem', 'product')
+
+    def test_popular_cache_hit_skips_database(self):
+        self.client.get('/api/products/popular/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/products/popular/').status_code, 200)
+
+    def test_popular_limit_bounds(self):
+        for limit, expected in (('-1', 1), ('0', 1), ('2', 2), ('50', 3), ('x', 3)):
+            with self.subTest(limit=limit):
+                response = self.client.get('/api/products/popular/', {'limit': limit})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()), expected)
+
+    def test_checkout_refreshes_popular(self):
+        self.assertEqual([row['slug'] for row in self.client.get('/api/products/popular/?limit=1').json()], ['product-0'])
+        customer = Customer.objects.create(first_name='Покупатель', email='buyer@example.com')
+        place_order(customer, {Product.objects.get(slug='product-2').id: 1})
+        self.assertEqual([row['slug'] for row in self.client.get('/api/products/popular/?limit=1').json()], ['product-2'])
+
+    def test_etag_does_not_depend_on_process_cache(self):
+        etag = self.get_etag('/api/categories/')
+        # Другой воркер — свой кэш; ETag у него тот же
+        cache.clear()
+        self.assertEqual(self.client.get('/api/categories/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class ListQueryCountTests(ApiTestCase):
+    # Число запросов списков API не должно зависеть от размера страницы
+    endpoints = ['categories', 'products', 'manufacturers', 'customers', 'orders', 'order-items', 'reviews']
+    rows = 20
+
+    def setUp(self):
+        super().setUp()
+        create_rows(self.rows)
+        self.client.force_authenticate(create_staff(is_superuser=True))
+
+    def assertConstantQueries(self, url):
+        counts = [count_queries(self, self.client, f'{url}page_size={size}') for size in (1, self.rows)]
+        self.assertEqual(counts[0], counts[1], url)
+
+    def test_lists(self):
+        for endpoint in self.endpoints:
+            with self.subTest(endpoint=endpoint):
+                self.assertConstantQueries(f'/api/{endpoint}/?')
+
+    def test_expand_costs_one_query_per_relation(self):
+        # Несколько строк в каждом заказе: размер заказа тоже не должен влиять
+        for order, product in zip(Order.objects.all(), Product.objects.order_by('-id')):
+            OrderItem.objects.create(order=order, product=product, quantity=2, price=2)
+        base = count_queries(self, self.client, '/api/orders/?page_size=1')
+        for expand, relations in [('customer', 1), ('items', 1), ('items.product', 2), ('customer,items,items.product', 3)]:
+            with self.subTest(expand=expand):
+                self.assertConstantQueries(f'/api/orders/?expand={expand}&')
+                self.assertEqual(count_queries(self, self.client, f'/api/orders/?expand={expand}&page_size={self.rows}'), base + relations)
+
+    def test_expanded_orders_match_database(self):
+        order = Order.objects.first()
+        OrderItem.objects.create(order=order, product=Product.objects.last(), quantity=2, price=Decimal('7.50'))
+        response = self.client.get(f'/api/orders/{order.id}/?expand=customer,items.product')
+        data = response.json()
+        self.assertEqual(data['customer']['email'], order.customer.email)
+        self.assertEqual(Decimal(data['total']), Decimal('8.50'))
+        self.assertEqual([item['product']['id'] for item in data['items']], list(order.items.order_by('id').values_list('product', flat=True)))
+
+    def test_unknown_expand_is_rejected(self):
+        self.assertEqual(self.client.get('/api/orders/?expand=items.review').status_code, 400)
+
+
+class CheckoutTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        create_catalogue(2)
+        self.first, self.second = Product.objects.order_by('id')
+        user = User.objects.create_user('buyer', 'buyer@example.com', 'pass12345')
+        Customer.objects.create(first_name='Покупатель', email='buyer@example.com', user=user)
+        self.client.force_authenticate(user)
+
+    def checkout(self, *lines):
+        items = [{'product': product.id, 'quantity': quantity} for product, quantity in lines]
+        return self.client.post('/api/checkout/', {'items': items}, format='json')
+
+    def test_checkout_decrements_stock(self):
+        response = self.checkout((self.first, 2), (self.second, 1), (self.first, 1))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Decimal(response.json()['total']), self.first.price * 3 + self.second.price)
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.stock, self.second.stock), (7, 9))
+
+    def test_shortage_rolls_back_whole_order(self):
+        # Первый товар уже списан, когда выясняется нехватка второго
+        response = self.checkout((self.first, 1), (self.second, 11))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(list(Product.objects.order_by('id').values_list('stock', flat=True)), [10, 10])
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+
+
+@unittest.skipIf(connection.vendor == 'sqlite', 'SQLite блокирует базу целиком и не дает параллельных записей')
+class ConcurrentCheckoutTests(TransactionTestCase):
+    threads = 8
+    stock = 5
+
+    def test_no_overselling(self):
+        category, _ = create_catalogue(0)
+        product = Product.objects.create(
+            name='Последние', slug='last', description='', price=1, stock=self.stock, category=category,
+        )
+        customer = Customer.objects.create(first_name='Покупатель', email='buyer@example.com')
+        barrier = threading.Barrier(self.threads)
+        results = []
+
+        def buy():
+            try:
+                barrier.wait()
+                for _ in range(2):
+                    try:
+                        place_order(customer, {product.id: 1})
+                        results.append('ok')
+                    except CheckoutError:
+                        results.append('shortage')
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=buy) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        product.refresh_from_db()
+        self.assertEqual(results.count('ok'), self.stock)
+        self.assertEqual(results.count('shortage'), self.threads * 2 - self.stock)
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(OrderItem.objects.filter(product=product).count(), self.stock)
+
+
+class ExportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        create_catalogue()
+        self.client.force_authenticate(create_staff())
+
+    def test_csv_streams_with_bom(self):
+        response = self.client.get('/api/products/export/?type=csv')
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('\ufeff'))
+        self.assertEqual(len(content.splitlines()), 4)
+
+    def test_formulas_neutralised(self):
+        Customer.objects.create(first_name='=HYPERLINK("http://x")', last_name='@SUM(A1)', email='buyer@example.com', phone='+79990000000')
+        content = b''.join(self.client.get('/api/customers/export/?type=csv').streaming_content).decode('utf-8')
+        self.assertIn('\'=HYPERLINK(""http://x"")', content)
+        self.assertIn("'@SUM(A1)", content)
+        self.assertIn("'+79990000000", content)
+        self.assertIn('buyer@example.com', content)
+
+    @unittest.skipIf(openpyxl is None, 'openpyxl не установлен')
+    def test_xlsx_formulas_neutralised(self):
+        Customer.objects.create(first_name='=1+1', last_name='-2', email='buyer@example.com')
+        response = self.client.get('/api/customers/export/?type=xlsx')
+        workbook = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        row = [cell.value for cell in workbook.worksheets[0][2]]
+        self.assertIn("'=1+1", row)
+        self.assertIn("'-2", row)
+        self.assertEqual(workbook.worksheets[0][2][1].data_type, 's')
+
+    @unittest.skipIf(openpyxl is None, 'openpyxl не установлен')
+    def test_xlsx_row_limit(self):
+        with override_settings(XLSX_EXPORT_MAX_ROWS=3):
+            self.assertEqual(self.client.get('/api/products/export/?type=xlsx').status_code, 200)
+        with override_settings(XLSX_EXPORT_MAX_ROWS=2):
+            self.assertEqual(self.client.get('/api/products/export/?type=xlsx').status_code, 400)
+        # Для CSV ограничения нет
+        with override_settings(XLSX_EXPORT_MAX_ROWS=2):
+            self.assertEqual(self.client.get('/api/products/export/?type=csv').status_code, 200)
+
+
+class BulkCreateTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.category, self.manufacturer = create_catalogue(0)
+
+    def row(self, slug, **kwargs):
+        return dict({
+            'name': slug, 'slug': slug, 'description': 'Описание', 'price': '5.00', 'stock': 1,
+            'category': self.category.id, 'manufacturer': self.manufacturer.id,
+        }, **kwargs)
+
+    def test_create_role_gets_201(self):
+        self.client.force_authenticate(create_staff(group='ViewAndCreate'))
+        response = self.client.post('/api/products/bulk/', [self.row('a'), self.row('b')], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(sorted(Product.objects.values_list('slug', flat=True)), ['a', 'b'])
+
+    def test_partial_errors_give_207(self):
+        self.client.force_authenticate(create_staff(group='ViewAndCreate'))
+        rows = [self.row('a'), self.row('b', price='дорого'), self.row('c', category=0)]
+        response = self.client.post('/api/products/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 207)
+        data = response.json()
+        self.assertEqual((data['created'], data['errors']), (1, 2))
+        self.assertEqual([result['status'] for result in data['results']], ['created', 'error', 'error'])
+        self.assertEqual(list(Product.objects.values_list('slug', flat=True)), ['a'])
+
+    def test_other_roles_get_403(self):
+        for group in ('ViewAndEdit', 'ViewAndDelete', 'ViewAndDeleteRole3', None):
+            with self.subTest(group=group):
+                self.client.force_authenticate(create_staff(f'staff-{group}', group=group))
+                response = self.client.post('/api/products/bulk/', [self.row('a')], format='json')
+                self.assertEqual(response.status_code, 403)
+        self.assertFalse(Product.objects.exists())
+
+    def test_single_create_follows_same_rule(self):
+        self.client.force_authenticate(create_staff(group='ViewAndEdit'))
+        self.assertEqual(self.client.post('/api/products/', self.row('a'), format='json').status_code, 403)
+        self.client.force_authenticate(create_staff('creator', group='ViewAndCreate'))
+        self.assertEqual(self.client.post('/api/products/', self.row('a'), format='json').status_code, 201)
+
+
+class FastListTests(ApiTestCase):
+    # Быстрый путь (values() + RowSerializer) должен давать тот же ответ, что сериализатор
+    urls = [
+        '/api/orders/?', '/api/orders/?fields=total&', '/api/orders/?fields=id,total&',
+        '/api/orders/?fields=status,total&', '/api/orders/?fields=customer,created_at&',
+        '/api/orders/?pagination=cursor&fields=total&', '/api/orders/?status=pending&fields=total,id&',
+        '/api/products/?', '/api/products/?fields=price,main_image&', '/api/products/?pagination=cursor&fields=name&',
+        '/api/categories/?fields=image&', '/api/customers/?fields=email&', '/api/order-items/?fields=price,order&',
+        '/api/reviews/?fields=created_at,rating&',
+    ]
+
+    def setUp(self):
+        super().setUp()
+        create_rows(5)
+        for order, product in zip(Order.objects.all(), Product.objects.order_by('-id')):
+            OrderItem.objects.create(order=order, product=product, quantity=2, price=Decimal('3.25'))
+        self.client.force_authenticate(create_staff(is_superuser=True))
+
+    def test_same_output_as_serializer(self):
+        for url in self.urls:
+            for page_size in (2, 10):
+                with self.subTest(url=url, page_size=page_size):
+                    fast = self.client.get(f'{url}page_size={page_size}')
+                    self.assertEqual(fast.status_code, 200)
+                    with mock.patch.object(FastListMixin, 'fast_list', False):
+                        regular = self.client.get(f'{url}page_size={page_size}')
+                    self.assertEqual(fast.json(), regular.json())
+
+    def test_order_totals(self):
+        totals = [Decimal(row['total']) for row in self.client.get('/api/orders/?fields=total').json()['results']]
+        self.assertEqual(totals, [Decimal('4.25')] * 5)
+
+
+class MixinOrderTests(TestCase):
+    # Порядок list-миксинов описан в начале api_store.mixins
+    def test_list_mixins_order(self):
+        order = [ConditionalGetMixin, NDJSONMixin, FastListMixin, CursorPaginationMixin, views.ModelViewSet]
+        for viewset in (views.CategoryViewSet, views.ProductViewSet, views.ManufacturerViewSet, views.CustomerViewSet,
+                        views.OrderViewSet, views.OrderItemViewSet, views.ReviewViewSet):
+            with self.subTest(viewset=viewset.__name__):
+                # ConditionalGetMixin есть не у всех; остальные обязательны
+                expected = [cls for cls in order if cls is not ConditionalGetMixin or issubclass(viewset, cls)]
+                self.assertEqual([cls for cls in viewset.__mro__ if cls in order], expected)
+
+
+class NDJSONTests(ApiTestCase):
+    # Строки NDJSON — те же объекты, что results обычного JSON-ответа
+    urls = [
+        '/api/orders/?', '/api/orders/?fields=total,created_at&', '/api/products/?',
+        '/api/categories/?', '/api/reviews/?', '/api/order-items/?fields=price&',
+    ]
+
+    def setUp(self):
+        super().setUp()
+        create_rows(5)
+        Category.objects.filter(slug='c1').update(image='categories/хлеб 1.jpg')
+        Customer.objects.filter(email='buyer-2@example.com').update(first_name='Строка\u2028перевод')
+        self.client.force_authenticate(create_staff(is_superuser=True))
+
+    def assertSameRows(self, url):
+        response = self.client.get(f'{url}format=ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).splitlines()
+        expected = self.client.get(f'{url}page_size=100', HTTP_ACCEPT='application/json').json()['results']
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_same_rows_as_json(self):
+        for url in self.urls + ['/api/customers/?']:
+            with self.subTest(url=url):
+                self.assertSameRows(url)
+                # и с JSON, собранным обычным сериализатором
+                with mock.patch.object(FastListMixin, 'fast_list', False):
+                    self.assertSameRows(url)
+
+    def test_serializer_path(self):
+        # ?expand= не собрать из values(): строки идут через сериализатор
+        self.assertSameRows('/api/orders/?expand=customer,items.product&')
+
+
+@unittest.skipIf(encoding.orjson is None, 'orjson не установлен')
+class JSONBackendTests(ApiTestCase):
+    # orjson и стандартный json должны давать одинаковые байты
+
+    def dumps_both(self, data):
+        with override_settings(API_JSON_BACKEND='json'):
+            expected = encoding.dumps(data)
+        with override_settings(API_JSON_BACKEND='orjson'):
+            self.assertTrue(encoding.use_orjson())
+            self.assertEqual(encoding.dumps(data), expected)
+        return expected
+
+    def test_values(self):
+        moscow = datetime.timezone(datetime.timedelta(hours=3))
+        data = {
+            'decimal': Decimal('10.50'), 'small': Decimal('0.0000001'), 'lazy': gettext_lazy('Текст'),
+            'utc': datetime.datetime(2026, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+            'micro': datetime.datetime(2026, 1, 2, 3, 4, 5, 6789, tzinfo=datetime.timezone.utc),
+            'moscow': datetime.datetime(2026, 1, 2, 3, 4, 5, tzinfo=moscow),
+            'separators': 'a\u2028b\u2029c', 'unicode': 'Хлеб', 'big': 2 ** 70, 1: [None, True, 1.5],
+        }
+        self.assertEqual(json.loads(self.dumps_both(data))['small'], '0.0000001')
+
+    def test_api_responses(self):
+        create_rows(3)
+        self.client.force_authenticate(create_staff(is_superuser=True))
+        order = Order.objects.first()
+        for url in ('/api/orders/', '/api/products/', '/api/reviews/', f'/api/orders/{order.id}/?expand=customer,items.product'):
+            with self.subTest(url=url):
+                with override_settings(API_JSON_BACKEND='json'):
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    expected = response.content
+                with override_settings(API_JSON_BACKEND='orjson'):
+                    self.assertEqual(self.client.get(url).content, expected)
+
+    def test_parser(self):
+        content = '{"name": "Хлеб\\u2028", "price": 10.5, "ids": [1, 2], "nested": {"a": null}}'.encode()
+        with override_settings(API_JSON_BACKEND='json'):
+            expected = encoding.loads(content)
+        self.assertEqual(encoding.loads(content), expected)
+
+
+class ProductIdsTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        create_catalogue(12)
+
+    def test_ids_returned_without_pagination(self):
+        ids = list(Product.objects.values_list('id', flat=True)[:11])
+        response = self.client.get('/api/products/?ids=' + ','.join(map(str, ids)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(row['id'] for row in response.json()), ids)
+
+    def test_empty_or_malformed_ids_rejected(self):
+        for value in ('', ',', ' ', '1,x', '-1'):
+            with self.subTest(ids=value):
+                self.assertEqual(self.client.get('/api/products/', {'ids': value}).status_code, 400)
+
+    def test_ids_limited_by_page_size(self):
+        ids = ','.join(str(pk) for pk in range(1, 102))
+        self.assertEqual(self.client.get(f'/api/products/?ids={ids}').status_code, 400)
+        ids = ','.join(str(pk) for pk in range(1, 101))
+        self.assertEqual(self.client.get(f'/api/products/?ids={ids}').status_code, 200)
+
+
+class ChangesTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        create_catalogue(7)
+        # Все строки изменены одним bulk-обновлением: одинаковый updated_at
+        self.past = timezone.now() - datetime.timedelta(minutes=5)
+        Product.objects.update(updated_at=self.past)
+
+    def sync(self, since=None, limit=2):
+        rows, deleted, pages = [], [], 0
+        while True:
+            params = {'limit': limit, **({'since': since} if since else {})}
+            response = self.client.get('/api/products/changes/', params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data['results']), limit)
+            self.assertLessEqual(len(data['deleted']), limit)
+            rows += [row['id'] for row in data['results']]
+            deleted += data['deleted']
+            since, pages = data['cursor'], pages + 1
+            if not data['has_more']:
+                return rows, deleted, since, pages
+
+    def test_equal_updated_at_split_across_pages(self):
+        rows, deleted, _, pages = self.sync()
+        self.assertEqual(rows, list(Product.objects.order_by('id').values_list('id', flat=True)))
+        self.assertEqual((deleted, pages), ([], 4))
+
+    def test_changes_after_cursor(self):
+        cursor = self.sync()[2]
+        changed = list(Product.objects.order_by('id').values_list('id', flat=True)[2:5])
+        later = self.past + datetime.timedelta(seconds=1)
+        Product.objects.filter(id__in=changed).update(updated_at=later)
+        rows, deleted, cursor, _ = self.sync(cursor)
+        self.assertEqual((rows, deleted), (changed, []))
+        # Повтор с последним курсором ничего не возвращает
+        self.assertEqual(self.sync(cursor)[:2], ([], []))
+
+    def test_deletions_beyond_limit(self):
+        cursor = self.sync()[2]
+        removed = list(Product.objects.order_by('id').values_list('id', flat=True)[:5])
+        for product in Product.objects.filter(id__in=removed):
+            product.delete()
+        # Свежие удаления тоже ждут changes_lag
+        self.assertEqual(self.sync(cursor)[1], [])
+        DeletionLog.objects.update(deleted_at=self.past)
+        rows, deleted, _, pages = self.sync(cursor)
+        self.assertEqual((rows, deleted, pages), ([], removed, 3))
+
+    def test_recent_rows_held_back(self):
+        cursor = self.sync()[2]
+        fresh = Product.objects.order_by('id').first()
+        fresh.stock = 1
+        fresh.save()
+        # Моложе changes_lag: не отдается, курсор не сдвигается за нее
+        rows, _, held_cursor, _ = self.sync(cursor)
+        self.assertEqual(rows, [])
+        Product.objects.filter(pk=fresh.pk).update(updated_at=timezone.now() - datetime.timedelta(seconds=10))
+        self.assertEqual(self.sync(held_cursor)[0], [fresh.id])
+
+    def test_bad_cursor(self):
+        for since in ('garbage', 'WzEsMl0=', 'WyJ4IiwgMSwgMl0='):
+            with self.subTest(since=since):
+                self.assertEqual(self.client.get('/api/products/changes/', {'since': since}).status_code, 400)
+
+
+class ChoicesTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.force_authenticate(create_staff())
+        for first_name, last_name, email in (
+            ('Иван', 'Петров', 'petrov'), ('Иванна', 'Сидорова', 'sidorova'),
+            ('Петр', 'Иванов', 'ivanov'), ('Анна', 'Смирнова', 'smirnova'),
+        ):
+            Customer.objects.create(first_name=first_name, last_name=last_name, email=f'{email}@example.com')
+
+    def labels(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [row['label'] for row in response.json()]
+
+    def test_choices_invalidated_by_writes(self):
+        create_catalogue(0)
+        self.assertEqual(self.labels('/api/categories/choices/'), ['Хлеб'])
+        with self.assertNumQueries(0):
+            self.labels('/api/categories/choices/')
+        category = Category.objects.create(name='Молоко', slug='milk')
+        self.assertEqual(self.labels('/api/categories/choices/'), ['Молоко', 'Хлеб'])
+        category.name = 'Сыр'
+        category.save()
+        self.assertEqual(self.labels('/api/categories/choices/'), ['Сыр', 'Хлеб'])
+        category.delete()
+        self.assertEqual(self.labels('/api/categories/choices/'), ['Хлеб'])
+
+    def test_autocomplete_matches_word_prefixes(self):
+        self.assertEqual(self.labels('/api/customers/autocomplete/', q='Иван'), ['Иван Петров', 'Иванна Сидорова', 'Петр Иванов'])
+        self.assertEqual(self.labels('/api/customers/autocomplete/', q='Иван Сид'), ['Иванна Сидорова'])
+        # Совпадение в середине слова не считается
+        self.assertEqual(self.labels('/api/customers/autocomplete/', q='нна'), [])
+        self.assertEqual(self.labels('/api/customers/autocomplete/', q='SMIRNOVA'), ['Анна Смирнова'])
+        self.assertEqual(self.labels('/api/customers/autocomplete/', q=' '), [])
+
+    def test_autocomplete_limited(self):
+        for i in range(25):
+            Customer.objects.create(first_name=f'Клиент {i}', email=f'client-{i}@example.com')
+        self.assertEqual(len(self.labels('/api/customers/autocomplete/', q='Клиент')), 20)
+        ids = ','.join(str(pk) for pk in Customer.objects.values_list('id', flat=True))
+        self.assertEqual(len(self.labels('/api/customers/autocomplete/', ids=ids)), 20)
+
+    def test_autocomplete_ids(self):
+        customer = Customer.objects.get(last_name='Иванов')
+        self.assertEqual(self.labels('/api/customers/autocomplete/', ids=str(customer.id)), ['Петр Иванов'])
+        for ids in ('x', '1,x', '-1', '1.5'):
+            with self.subTest(ids=ids):
+                self.assertEqual(self.client.get('/api/customers/autocomplete/', {'ids': ids}).status_code, 400)
@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     CategoryViewSet, ProductViewSet, ManufacturerViewSet,
     CustomerViewSet, OrderViewSet, OrderItemViewSet, ReviewViewSet,
-    AuthLoginView, AuthLogoutView
+    AuthLoginView, AuthLogoutView, ApiStatsView, CheckoutView
 )
 
 router = DefaultRouter()
@@ -18,4 +18,6 @@ router.register(r'reviews', ReviewViewSet)
 urlpatterns = [
     path('auth/login/', AuthLoginView.as_view(), name='api_auth_login'),
     path('auth/logout/', AuthLogoutView.as_view(), name='api_auth_logout'),
+    path('stats/', ApiStatsView.as_view(), name='api_stats'),
+    path('checkout/', CheckoutView.as_view(), name='api_checkout'),
 ] + router.urls
\ No newline at end of file
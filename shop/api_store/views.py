@@ -3,31 +3,46 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.filters import SearchFilter
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter, SearchFilter
+from django.conf import settings
+from django.core.cache import cache
 from django.contrib.auth import authenticate, login, logout
-from django.db.models import Q
+from django.db.models import DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
 from .serializers import (
     CategorySerializer, ProductSerializer, ManufacturerSerializer,
-    CustomerSerializer, OrderSerializer, OrderItemSerializer, ReviewSerializer
+    CustomerSerializer, OrderSerializer, OrderItemSerializer, ReviewSerializer,
+    CheckoutSerializer
 )
 from shops.models import (
     Category, Product, Manufacturer, Customer, Order, OrderItem, Review
 )
+from shops.transports import get_transport, pool_stats
+from shops.cache import get_version
+from shops.utils import response_cache
+from shops.services import CheckoutError, place_order, popular_product_ids
+from shops.search import get_search_engine
 from .pagination import CustomPagination
-from .permissions import IsViewAndEditOnly, IsViewAndDeleteOnly, IsViewAndDeleteOnlyRole3
+from .filters import FieldFilterBackend
+from .mixins import BulkMixin, ChangesMixin, FastListMixin, NDJSONMixin, ChoicesMixin, ExportMixin, ConditionalGetMixin, CursorPaginationMixin, ExpandMixin, SparseFieldsMixin
+from .permissions import IsStaffRole
+from .authentication import token_cache
 
-class CategoryViewSet(ModelViewSet):
+class CategoryViewSet(BulkMixin, ChoicesMixin, ChangesMixin, ConditionalGetMixin, SparseFieldsMixin, NDJSONMixin, FastListMixin, CursorPaginationMixin, ModelViewSet):
     queryset = Category.objects.all().order_by('id')
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
-    filter_backends = [SearchFilter]
+    filter_backends = [FieldFilterBackend, SearchFilter]
     search_fields = ['name']
+    filter_fields = {'slug': 'slug'}
 
     def get_permissions(self):
         if self.request.method in ['GET', 'HEAD', 'OPTIONS']:
             return [AllowAny()]
-        return [IsAuthenticated(), IsViewAndEditOnly() | IsViewAndDeleteOnly() | IsViewAndDeleteOnlyRole3()]
+        return [IsAuthenticated(), IsStaffRole()]
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -36,33 +51,82 @@ class CategoryViewSet(ModelViewSet):
             queryset = queryset.filter(Q(name__icontains=search_query))
         return queryset
 
-class ProductViewSet(ModelViewSet):
+class ProductViewSet(BulkMixin, ExportMixin, ChoicesMixin, ChangesMixin, ConditionalGetMixin, SparseFieldsMixin, NDJSONMixin, FastListMixin, CursorPaginationMixin, ModelViewSet):
     queryset = Product.objects.all().order_by('id')
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
-    filter_backends = [SearchFilter]
-    search_fields = ['name', 'description']
+    filter_backends = [FieldFilterBackend, OrderingFilter]
+    filter_fields = {'slug': 'slug', 'category': 'category', 'manufacturer': 'manufacturer', 'ids': 'id__in'}
+    ordering_fields = ['id', 'name', 'price', 'stock']
+    # ?ids= отдается одним ответом без пагинации, поэтому id не больше, чем строк на странице
+    max_filter_values = CustomPagination.max_page_size
+    export_fields = [
+        ('ID', 'id'), ('Название', 'name'), ('URL-имя', 'slug'), ('Цена', 'price'), ('Остаток', 'stock'),
+        ('ID категории', 'category_id'), ('Категория', 'category__name'),
+        ('ID производителя', 'manufacturer_id'), ('Производитель', 'manufacturer__name'),
+        ('Изменен', 'updated_at'),
+    ]
 
     def get_permissions(self):
         if self.request.method in ['GET', 'HEAD', 'OPTIONS']:
             return [AllowAny()]
-        return [IsAuthenticated(), IsViewAndEditOnly() | IsViewAndDeleteOnly() | IsViewAndDeleteOnlyRole3()]
+        return [IsAuthenticated(), IsStaffRole()]
 
     def get_queryset(self):
         queryset = super().get_queryset()
         search_query = self.request.query_params.get('search', None)
         if search_query:
-            queryset = queryset.filter(
-                Q(name__icontains=search_query) | Q(description__icontains=search_query)
-            )
+            # Полнотекстовый поиск с ранжированием (shops.search)
+            queryset = get_search_engine().search(queryset, search_query)
         return queryset
 
-class ManufacturerViewSet(ModelViewSet):
+    def filter_autocomplete(self, queryset, query):
+        # Префиксный полнотекстовый поиск по GIN-индексу, лучшие совпадения первыми
+        return get_search_engine().search(queryset, query)
+
+    def get_requested_ids(self):
+        value = self.request.query_params.get('ids')
+        if value is None:
+            return None
+        ids = [item.strip() for item in value.split(',') if item.strip()]
+        if not ids or not all(item.isdigit() for item in ids):
+            raise ValidationError({'ids': 'Ожидается список id через запятую.'})
+        return ids
+
+    def paginate_queryset(self, queryset):
+        # ?ids=1,2,3 (корзина, оформление заказа): запрошенный набор
+        # (не больше max_filter_values) возвращается целиком, без пагинации.
+        if self.get_requested_ids():
+            return None
+        return super().paginate_queryset(queryset)
+
+    @action(detail=False)
+    def popular(self, request):
+        # Популярные товары для главной страницы: считаются по продажам (OrderItem)
+        # и кэшируются до изменения заказов или товаров либо до истечения таймаута.
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 3)), 20))
+        except ValueError:
+            limit = 3
+        key = 'popular_products:{}:{}:{}:{}'.format(
+            limit, request.get_host(), request.query_params.get('fields', ''),
+            get_version('orderitem', 'product'),
+        )
+        data = cache.get(key)
+        if data is None:
+            ids = popular_product_ids(limit)
+            products = {product.id: product for product in Product.objects.filter(id__in=ids)}
+            data = self.get_serializer([products[pk] for pk in ids if pk in products], many=True).data
+            cache.set(key, data, settings.POPULAR_PRODUCTS_TIMEOUT)
+        return Response(data)
+
+class ManufacturerViewSet(BulkMixin, ChoicesMixin, ChangesMixin, ConditionalGetMixin, SparseFieldsMixin, NDJSONMixin, FastListMixin, CursorPaginationMixin, ModelViewSet):
     queryset = Manufacturer.objects.all().order_by('id')
     serializer_class = ManufacturerSerializer
-    permission_classes = [IsAuthenticated, IsViewAndEditOnly | IsViewAndDeleteOnly | IsViewAndDeleteOnlyRole3]
-    filter_backends = [SearchFilter]
+    permission_classes = [IsAuthenticated, IsStaffRole]
+    filter_backends = [FieldFilterBackend, SearchFilter]
     search_fields = ['name', 'country']
+    filter_fields = {'country': 'country'}
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -73,12 +137,19 @@ class ManufacturerViewSet(ModelViewSet):
             )
         return queryset
 
-class CustomerViewSet(ModelViewSet):
+class CustomerViewSet(ExportMixin, ChoicesMixin, ChangesMixin, SparseFieldsMixin, NDJSONMixin, FastListMixin, CursorPaginationMixin, ModelViewSet):
     queryset = Customer.objects.all().order_by('id')
     serializer_class = CustomerSerializer
-    permission_classes = [IsAuthenticated, IsViewAndEditOnly | IsViewAndDeleteOnly | IsViewAndDeleteOnlyRole3]
-    filter_backends = [SearchFilter]
+    permission_classes = [IsAuthenticated, IsStaffRole]
+    filter_backends = [FieldFilterBackend, SearchFilter]
     search_fields = ['first_name', 'last_name', 'email']
+    filter_fields = {'email': 'email', 'user': 'user'}
+    choice_label_fields = ('first_name', 'last_name')
+    export_fields = [
+        ('ID', 'id'), ('Имя', 'first_name'), ('Фамилия', 'last_name'), ('Email', 'email'),
+        ('Телефон', 'phone'), ('Создан', 'created_at'),
+    ]
+    autocomplete_fields = ('first_name', 'last_name', 'email')
 
     def create(self, request, *args, **kwargs):
         print("CustomerViewSet: Create request data:", request.data)
@@ -92,33 +163,50 @@ class CustomerViewSet(ModelViewSet):
             print("CustomerViewSet: Serializer errors:", serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class OrderViewSet(ModelViewSet):
+class OrderViewSet(ExportMixin, ExpandMixin, SparseFieldsMixin, NDJSONMixin, FastListMixin, CursorPaginationMixin, ModelViewSet):
     queryset = Order.objects.all().order_by('id')
     serializer_class = OrderSerializer
+    cursor_ordering = ('-created_at', '-id')
     # Измените permission_classes для POST-запросов
     permission_classes = [AllowAny]  # Начальное значение для совместимости
-    filter_backends = [SearchFilter]
+    filter_backends = [FieldFilterBackend, SearchFilter]
     search_fields = ['status']
+    filter_fields = {'customer': 'customer', 'status': 'status'}
+    # Одна строка на позицию заказа; заказ без позиций — одна строка с пустыми полями товара
+    export_fields = [
+        ('ID заказа', 'id'), ('Дата', 'created_at'), ('Статус', 'status'),
+        ('ID покупателя', 'customer_id'), ('Имя', 'customer__first_name'), ('Фамилия', 'customer__last_name'),
+        ('Email', 'customer__email'), ('ID товара', 'items__product_id'), ('Товар', 'items__product__name'),
+        ('Количество', 'items__quantity'), ('Сумма', 'items__price'),
+    ]
 
     def get_permissions(self):
         # Разрешить всем аутентифицированным пользователям для POST, остальные методы ограничены
         if self.request.method == 'POST':
             return [IsAuthenticated()]  # Только аутентификация для создания заказов
-        return [IsAuthenticated(), IsViewAndEditOnly() | IsViewAndDeleteOnly() | IsViewAndDeleteOnlyRole3()]
+        return [IsAuthenticated(), IsStaffRole()]
 
     def get_queryset(self):
         queryset = super().get_queryset()
         search_query = self.request.query_params.get('search', None)
         if search_query:
             queryset = queryset.filter(Q(status__icontains=search_query))
-        return queryset
+        # В OrderItem.price хранится сумма по строке
+        return queryset.annotate(total=Coalesce(Sum('items__price'), Value(0), output_field=DecimalField()))
+
+    def get_export_queryset(self):
+        # Фильтры списка применяются подзапросом: аннотация total (GROUP BY)
+        # не совмещается с соединением по позициям заказа.
+        orders = self.filter_queryset(self.get_queryset()).order_by().values('id')
+        return Order.objects.filter(id__in=orders).order_by('-created_at', '-id', 'items__id')
 
-class OrderItemViewSet(ModelViewSet):
+class OrderItemViewSet(ExpandMixin, SparseFieldsMixin, NDJSONMixin, FastListMixin, CursorPaginationMixin, ModelViewSet):
     queryset = OrderItem.objects.all().order_by('id')
     serializer_class = OrderItemSerializer
-    permission_classes = [IsAuthenticated, IsViewAndEditOnly | IsViewAndDeleteOnly | IsViewAndDeleteOnlyRole3]
-    filter_backends = [SearchFilter]
+    permission_classes = [IsAuthenticated, IsStaffRole]
+    filter_backends = [FieldFilterBackend, SearchFilter]
     search_fields = ['product__name']
+    filter_fields = {'order': 'order', 'product': 'product'}
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -127,12 +215,14 @@ class OrderItemViewSet(ModelViewSet):
             queryset = queryset.filter(Q(product__name__icontains=search_query))
         return queryset
 
-class ReviewViewSet(ModelViewSet):
+class ReviewViewSet(SparseFieldsMixin, NDJSONMixin, FastListMixin, CursorPaginationMixin, ModelViewSet):
     queryset = Review.objects.all().order_by('id')
     serializer_class = ReviewSerializer
-    permission_classes = [IsAuthenticated, IsViewAndEditOnly | IsViewAndDeleteOnly | IsViewAndDeleteOnlyRole3]
-    filter_backends = [SearchFilter]
+    cursor_ordering = ('-created_at', '-id')
+    permission_classes = [IsAuthenticated, IsStaffRole]
+    filter_backends = [FieldFilterBackend, SearchFilter]
     search_fields = ['comment']
+    filter_fields = {'product': 'product', 'customer': 'customer', 'rating': 'rating'}
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -141,6 +231,26 @@ class ReviewViewSet(ModelViewSet):
             queryset = queryset.filter(Q(comment__icontains=search_query))
         return queryset
 
+class CheckoutView(APIView):
+    permission_classes = [IsAuthenticated]
+    def post(self, request):
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        customer = (
+            Customer.objects.filter(user=request.user).first()
+            or Customer.objects.filter(email=request.user.email).first()
+        )
+        if customer is None:
+            return Response({'detail': 'Профиль покупателя не найден.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            order, items = place_order(customer, serializer.validated_data['items'])
+        except CheckoutError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        data = OrderSerializer(order).data
+        data['items'] = OrderItemSerializer(items, many=True).data
+        data['total'] = str(sum(item.price for item in items))
+        return Response(data, status=status.HTTP_201_CREATED)
+
 class AuthLoginView(APIView):
     permission_classes = [AllowAny]
     def post(self, request):
@@ -166,7 +276,18 @@ class AuthLogoutView(APIView):
         print("AuthLogoutView: User:", request.user)
         if request.user.is_authenticated:
             Token.objects.filter(user=request.user).delete()
+            token_cache.invalidate_user(request.user.pk)
             request.session.flush()
             logout(request)
             return Response({'message': 'Выход выполнен'}, status=status.HTTP_200_OK)
-        return Response({'error': 'Не аутентифицирован'}, status=status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+        return Response({'error': 'Не аутентифицирован'}, status=status.HTTP_401_UNAUTHORIZED)
+
+class ApiStatsView(APIView):
+    permission_classes = [IsAdminUser]
+    def get(self, request):
+        return Response({
+            'transport': get_transport().__class__.__name__,
+            'http_pool': pool_stats.snapshot(),
+            'token_cache': token_cache.stats(),
+            'response_cache': response_cache.stats(),
+        })
\ No newline at end of file
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # OpClass в индексах (shops.search.PrefixSearchIndex)
     'shops.apps.ShopsConfig',
     'api_store.apps.ApiStoreConfig',
     'rest_framework',
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'shops.middleware.SessionRefreshMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',  # Убедитесь, что это здесь
@@ -66,6 +68,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'shops.context_processors.cart',
             ],
         },
     },
@@ -119,11 +122,55 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Кэш. LocMemCache работает в пределах одного процесса; при нескольких воркерах
+# укажите общий кэш (например, django.core.cache.backends.redis.RedisCache),
+# чтобы сброс версий кэшированных данных был виден всем процессам.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shop',
+    }
+}
+# Версии моделей для ключей кэша и ETag считаются по БД (shops.cache.model_state)
+# и запоминаются в кэше на столько секунд; запись через save()/delete() и массовые
+# операции сбрасывает их сразу, update() в обход сигналов виден не позже таймаута.
+# При кэше в памяти процесса другие воркеры видят изменения с той же задержкой.
+MODEL_STATE_TIMEOUT = 2
+# Срок хранения журнала удалений (manage.py prune_deletion_log, запускать по расписанию);
+# клиенты api/<модель>/changes/ должны синхронизироваться чаще.
+DELETION_LOG_RETENTION_DAYS = 30
+# Время жизни кэша популярных товаров на главной (секунды)
+POPULAR_PRODUCTS_TIMEOUT = 600
+# Время жизни кэша страниц и данных витрины (категории, товары категории, все товары).
+# Устаревание определяется версией каталога из БД (shops.cache.model_state), поэтому
+# правки через любой процесс видны сразу; таймаут лишь освобождает память.
+CATALOG_CACHE_TIMEOUT = 600
+# Время жизни кэша списков выбора для форм (api/<модель>/choices/); сбрасывается версией модели
+CHOICES_CACHE_TIMEOUT = 3600
+
+# Выгрузка в XLSX (api/<модель>/export/?type=xlsx) собирается целиком до отправки:
+# больше XLSX_EXPORT_MAX_ROWS строк — 400, такие объемы выгружаются потоком в CSV.
+# До XLSX_EXPORT_SPOOL_SIZE байт файл держится в памяти, дальше — на диске.
+XLSX_EXPORT_MAX_ROWS = 100000
+XLSX_EXPORT_SPOOL_SIZE = 10 * 1024 * 1024
+
+# Полнотекстовый поиск товаров: словарь PostgreSQL под LANGUAGE_CODE.
+# SEARCH_ENGINE по умолчанию выбирается по СУБД (см. shops.search.get_search_engine).
+SEARCH_CONFIG = 'russian'
+
 # Настройки сессий
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# cached_db: чтение из кэша, запись в БД только при изменении сессии.
+# 'django.contrib.sessions.backends.cache' — полностью без БД (при общем кэше, например Redis).
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 SESSION_COOKIE_AGE = 3600  # Сессия истекает через 1 час (3600 секунд)
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True  # Сессия удаляется при закрытии браузера
-SESSION_SAVE_EVERY_REQUEST = True  # Обновлять сессию при каждом запросе
+SESSION_SAVE_EVERY_REQUEST = False  # Сессия сохраняется только при изменении
+SESSION_REFRESH_INTERVAL = 1800  # Продление сессии не чаще раза в 30 минут (shops.middleware)
+
+# Хранилище корзины: shops.cart.SessionCartStore (в сессии) или shops.cart.CacheCartStore (в кэше)
+CART_STORE = 'shops.cart.SessionCartStore'
+CART_CACHE_ALIAS = 'default'
+CART_TIMEOUT = 7 * 24 * 3600
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
@@ -147,6 +194,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # OpClass в индексах (shops.search.PrefixSearchIndex)
     'rest_framework',
     'rest_framework.authtoken',
     'api_store.apps.ApiStoreConfig',
@@ -156,18 +204,62 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api_store.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api_store.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api_store.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'api_store.pagination.CustomPagination',  # Исправлен путь
     'PAGE_SIZE': 10,
     'PAGE_SIZE_QUERY_PARAM': 'page_size',
     'MAX_PAGE_SIZE': 100,
 }
+# JSON для API и api_request (api_store.encoding): 'orjson' — если пакет установлен,
+# иначе автоматически стандартный json; 'json' — всегда стандартный.
+API_JSON_BACKEND = 'orjson'
+# Кэш токенов API в памяти процесса (api_store.authentication): размер и время жизни записи, с.
+# Отзыв токена (выход, удаление, деактивация пользователя) сбрасывает кэш только
+# в своем процессе; другие воркеры принимают отозванный токен еще до ttl секунд.
+# ttl — окно отзыва; 0 — без кэша, проверка токена в БД на каждый запрос.
+TOKEN_CACHE = {
+    'maxsize': 1000,
+    'ttl': 60,
+}
 API_BASE_URL = 'http://127.0.0.1:8000/api'
+# Кэш GET-ответов API в shops.utils.api_request (условные запросы с If-None-Match)
+API_RESPONSE_CACHE = {
+    'maxsize': 500,
+}
+# Транспорт для shops.utils.api_request:
+#   'shops.transports.LocalTransport' — API в том же процессе, вызов без сети;
+#   'shops.transports.HttpTransport' — API развернуто отдельно, обращение по API_BASE_URL.
+# Асинхронные страницы админки (shops.utils.aapi_request) под ASGI-сервером ходят в API
+# через общий httpx.AsyncClient с теми же лимитами пула; под WSGI — через клиент
+# на один вызов (у каждого запроса свой цикл событий); без httpx — через пул потоков.
+API_TRANSPORT = 'shops.transports.LocalTransport'
+# Пул соединений HttpTransport (значения по умолчанию — shops.transports.DEFAULT_HTTP_POOL)
+API_HTTP_POOL = {
+    'pool_connections': 10,  # число хостов, для которых держится пул
+    'pool_maxsize': 20,  # соединений на хост
+    'pool_block': True,  # при исчерпании пула ждать, а не открывать лишние соединения
+    'retries': 2,  # повторы только для идемпотентных методов
+    'backoff_factor': 0.2,
+}
+# Таймауты HttpTransport по префиксу эндпоинта, в секундах: число или (connect, read)
+API_TIMEOUTS = {
+    'default': 5,
+    'auth/': (2, 10),
+}
 
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
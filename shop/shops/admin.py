@@ -19,6 +19,8 @@ class ManufacturerAdmin(admin.ModelAdmin):
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug', 'price', 'stock', 'category', 'manufacturer']
+    # manufacturer может быть NULL — автоматический select_related админки его не захватывает
+    list_select_related = ['category', 'manufacturer']
     list_filter = ['category', 'manufacturer']
     search_fields = ['name', 'description', 'slug']
     prepopulated_fields = {'slug': ('name',)}
@@ -35,6 +37,7 @@ class CustomerAdmin(admin.ModelAdmin):
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['id', 'customer', 'status', 'created_at']
+    list_select_related = ['customer']
     list_filter = ['status', 'created_at']
     search_fields = ['customer__first_name', 'customer__last_name', 'id']
     list_editable = ['status']
@@ -43,6 +46,7 @@ class OrderAdmin(admin.ModelAdmin):
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'product', 'quantity', 'price']
+    list_select_related = ['order', 'product']
     list_filter = ['order']
     search_fields = ['product__name', 'order__id']
     ordering = ['order']
@@ -50,6 +54,7 @@ class OrderItemAdmin(admin.ModelAdmin):
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ['product', 'customer', 'rating', 'created_at']
+    list_select_related = ['product', 'customer']
     list_filter = ['rating', 'created_at']
     search_fields = ['product__name', 'customer__first_name', 'customer__last_name']
     ordering = ['-created_at']
\ No newline at end of file
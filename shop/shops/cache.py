@@ -0,0 +1,144 @@
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def read_model_state(name):
+    """
+    Состояние одной модели shops по данным БД: (части версии, время изменения).
+    Для моделей с updated_at — max(updated_at) (индекс по updated_at) и последняя
+    запись DeletionLog этой модели (индекс (model, id), одна строка): меняется
+    при save(), bulk_create/bulk_update и update() с updated_at, а также при удалении.
+    Для остальных — число строк и max(id): полный просмотр таблицы, только для небольших.
+    """
+    model = apps.get_model('shops', name)
+    if not any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        state = model._default_manager.aggregate(count=Count('pk'), last=Max('pk'))
+        return [state['count'], state['last'] or 0], None
+    updated = model._default_manager.aggregate(last=Max('updated_at'))['last']
+    deletion = (
+        apps.get_model('shops', 'DeletionLog')._default_manager
+        .filter(model=name).order_by('-id').values_list('id', 'deleted_at').first()
+    ) or (0, None)
+    return (
+        [int(updated.timestamp() * 10 ** 6) if updated else 0, deletion[0]],
+        max(filter(None, (updated, deletion[1])), default=None),
+    )
+
+
+def model_state_key(name):
+    return f'model_state:{name}'
+
+
+def model_state(*names):
+    """
+    Состояние моделей shops: (версия, время последнего изменения). Одинаково
+    во всех процессах и при любом бэкенде CACHES: считается по БД
+    (read_model_state) и запоминается в кэше на MODEL_STATE_TIMEOUT секунд.
+    Запись через save()/delete() и через BulkWriter/place_order сбрасывает
+    запомненное сразу (invalidate_model_state); update() в обход сигналов
+    становится виден по истечении таймаута.
+    """
+    timeout = getattr(settings, 'MODEL_STATE_TIMEOUT', 2)
+    states = cache.get_many([model_state_key(name) for name in names]) if timeout else {}
+    parts, last_modified, missing = [], None, {}
+    for name in names:
+        key = model_state_key(name)
+        if key not in states:
+            states[key] = missing[key] = read_model_state(name)
+        name_parts, updated = states[key]
+        parts += name_parts
+        last_modified = max(filter(None, (last_modified, updated)), default=None)
+    if missing and timeout:
+        cache.set_many(missing, timeout)
+    return '-'.join(str(part) for part in parts), last_modified
+
+
+def invalidate_model_state(*names):
+    # Сразу — для следующих запросов этого процесса и этой транзакции,
+    # и после фиксации — чтобы параллельный запрос не запомнил состояние до нее.
+    keys = [model_state_key(name) for name in names]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_version(*names):
+    # Версия для ключей кэша и ETag; изменение любой из моделей ее меняет.
+    return model_state(*names)[0]
+
+
+# Витрина (категории, товары категории, все товары) зависит от этих моделей;
+# изменение любой из них делает устаревшими все закэшированные страницы витрины.
+CATALOG_MODELS = ('category', 'product', 'manufacturer')
+CATALOG_PAGE_PARAMS = ('page', 'page_size', 'search', 'pagination', 'cursor')
+
+
+def catalog_state(request):
+    # Один раз на запрос: и страница, и ее данные из API берутся под одной версией.
+    if not hasattr(request, '_catalog_state'):
+        request._catalog_state = model_state(*CATALOG_MODELS)
+    return request._catalog_state
+
+
+def catalog_version(request):
+    return catalog_state(request)[0]
+
+
+def catalog_cache_key(prefix, version, request, *parts):
+    # Хост входит в ключ: API отдает абсолютные ссылки на изображения.
+    raw = ':'.join(str(part) for part in (request.get_host(), *parts))
+    return f'{prefix}:{version}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def catalog_page_key(version, request):
+    # Ключ строится только из значимых параметров: посторонние (utm_* и т.п.)
+    # не размножают копии страницы в кэше.
+    params = sorted((name, request.GET.get(name)) for name in CATALOG_PAGE_PARAMS if request.GET.get(name))
+    return catalog_cache_key('catalog_page', version, request, request.path, urlencode(params))
+
+
+def cache_catalog_page(view):
+    """
+    Кэш страниц витрины для анонимных пользователей с ETag / Last-Modified.
+    Для вошедших пользователей страница содержит личные данные (корзина, меню),
+    поэтому отдается без кэша.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or request.user.is_authenticated or len(get_messages(request)):
+            return view(request, *args, **kwargs)
+        version, last_modified = catalog_state(request)
+        key = catalog_page_key(version, request)
+        etag = quote_etag(key.rsplit(':', 1)[1] + f'-{version}')
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        # Решает только ETag: If-Modified-Since с точностью до секунды пропустил бы
+        # изменение в ту же секунду.
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = cache.get(key)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+                # Ответы с cookie (csrftoken, сессия) не кэшируются — они личные.
+                if response.status_code == 200 and not response.cookies:
+                    cache.set(key, response, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 600))
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    return wrapper
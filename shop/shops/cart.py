@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+class SessionCartStore:
+    """Корзина в сессии. Сессия сохраняется только при изменении корзины."""
+    session_key = 'cart'
+
+    def __init__(self, request):
+        self.session = request.session
+
+    def load(self):
+        return dict(self.session.get(self.session_key, {}))
+
+    def save(self, lines):
+        self.session[self.session_key] = lines
+
+    def clear(self):
+        self.session.pop(self.session_key, None)
+
+
+class CacheCartStore:
+    """
+    Корзина в кэше (settings.CART_CACHE_ALIAS), привязана к пользователю:
+    изменения корзины не пишутся в таблицу сессий.
+    """
+
+    def __init__(self, request):
+        self.cache = caches[getattr(settings, 'CART_CACHE_ALIAS', 'default')]
+        self.key = f'cart:{request.user.pk}' if request.user.is_authenticated else None
+
+    def load(self):
+        return dict(self.cache.get(self.key, {})) if self.key else {}
+
+    def save(self, lines):
+        if self.key:
+            self.cache.set(self.key, lines, getattr(settings, 'CART_TIMEOUT', 7 * 24 * 3600))
+
+    def clear(self):
+        if self.key:
+            self.cache.delete(self.key)
+
+
+class Cart:
+    """
+    Корзина покупателя: {'<product_id>': quantity} с построчными операциями.
+    Хранилище задается settings.CART_STORE; запись выполняется только
+    при фактическом изменении строк.
+    """
+
+    def __init__(self, request):
+        self.store = import_string(getattr(settings, 'CART_STORE', 'shops.cart.SessionCartStore'))(request)
+        self.lines = self.store.load()
+
+    def __iter__(self):
+        return iter(self.lines.items())
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    def __contains__(self, product_id):
+        return str(product_id) in self.lines
+
+    def product_ids(self):
+        return list(self.lines)
+
+    def get(self, product_id):
+        return self.lines.get(str(product_id), 0)
+
+    def add(self, product_id, quantity=1):
+        self.set(product_id, self.get(product_id) + quantity)
+
+    def set(self, product_id, quantity):
+        if self.lines.get(str(product_id)) == quantity:
+            return
+        self.lines[str(product_id)] = quantity
+        self.store.save(self.lines)
+
+    def remove(self, product_id):
+        if self.lines.pop(str(product_id), None) is not None:
+            self.store.save(self.lines)
+
+    def clear(self):
+        self.lines = {}
+        self.store.clear()
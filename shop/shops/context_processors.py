@@ -0,0 +1,8 @@
+from .cart import Cart
+
+
+def cart(request):
+    # Число позиций для виджета корзины в шапке; анонимным посетителям сессия не создается.
+    if not request.user.is_authenticated:
+        return {'cart_count': 0}
+    return {'cart_count': len(Cart(request))}
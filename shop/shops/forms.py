@@ -1,7 +1,72 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .utils import api_request
+from django.urls import reverse
+from .utils import api_gather, api_request
+
+def parse_choices(data):
+    return [(str(item['id']), item['label']) for item in data] if data else []
+
+def get_choices(request, endpoint):
+    # Полный список для небольших справочников: [('id', 'подпись')], кэшируется на стороне API
+    return parse_choices(api_request('GET', f'{endpoint}/choices/', request))
+
+class AutocompleteWidget(forms.Widget):
+    template_name = 'widgets/autocomplete.html'
+
+    def __init__(self, source, attrs=None):
+        super().__init__(attrs)
+        self.source = source
+        self.label = ''
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['url'] = reverse('autocomplete', args=[self.source])
+        context['widget']['label'] = self.label
+        return context
+
+class AutocompleteField(forms.IntegerField):
+    """
+    Выбор из большой таблицы (покупатели, товары) через автодополнение
+    вместо select со всеми строками. source — эндпоинт API, например 'customers'.
+    """
+
+    def __init__(self, source, **kwargs):
+        kwargs.setdefault('widget', AutocompleteWidget(source))
+        kwargs.setdefault('error_messages', {'required': 'Выберите значение из подсказок.'})
+        super().__init__(**kwargs)
+        self.source = source
+
+    def label_endpoint(self, value):
+        return f'{self.source}/autocomplete/?ids={value}'
+
+    def set_label(self, data):
+        if data:
+            self.widget.label = f"{data[0]['label']} (#{data[0]['id']})"
+
+    def load_label(self, request, value):
+        # Подпись для уже выбранного значения (форма редактирования, повторный показ после ошибки)
+        if not value:
+            return
+        self.set_label(api_request('GET', self.label_endpoint(value), request))
+
+def autocomplete_values(form):
+    for name, field in form.fields.items():
+        if isinstance(field, AutocompleteField):
+            value = form.data.get(form.add_prefix(name)) if form.is_bound else form.initial.get(name)
+            if str(value or '').isdigit():
+                yield field, value
+
+def load_autocomplete_labels(form, request):
+    for field, value in autocomplete_values(form):
+        field.load_label(request, value)
+
+async def aload_autocomplete_labels(form, request):
+    # Для асинхронных представлений: подписи всех полей запрашиваются одновременно
+    fields = list(autocomplete_values(form))
+    results = await api_gather(request, *(field.label_endpoint(value) for field, value in fields))
+    for (field, _), data in zip(fields, results):
+        field.set_label(data)
 
 class RegisterForm(UserCreationForm):
     email = forms.EmailField(required=True, label='Email')
@@ -31,15 +96,17 @@ class ProductForm(forms.Form):
 
     def __init__(self, *args, **kwargs):
         request = kwargs.pop('request', None)
+        # Асинхронные представления загружают справочники заранее (api_gather) и передают их сюда
+        categories = kwargs.pop('categories', None)
+        manufacturers = kwargs.pop('manufacturers', None)
+        # UpdateView передает объект API (dict); шаблон формы использует form.instance.id
+        self.instance = kwargs.pop('instance', None)
         super().__init__(*args, **kwargs)
         if request:
-            categories_data = api_request('GET', 'categories/', request)
-            self.fields['category'].choices = [(str(cat['id']), cat['name']) for cat in categories_data.get('results', [])] if categories_data else []
-            manufacturers_data = api_request('GET', 'manufacturers/', request)
-            self.fields['manufacturer'].choices = [('', '---------')] + [(str(m['id']), m['name']) for m in manufacturers_data.get('results', [])] if manufacturers_data else [('', '---------')]
-        else:
-            self.fields['category'].choices = []
-            self.fields['manufacturer'].choices = [('', '---------')]
+            categories = get_choices(request, 'categories')
+            manufacturers = get_choices(request, 'manufacturers')
+        self.fields['category'].choices = categories or []
+        self.fields['manufacturer'].choices = [('', '---------')] + (manufacturers or [])
 
 class CustomerForm(forms.Form):
     first_name = forms.CharField(max_length=50, label='Имя')
@@ -48,7 +115,7 @@ class CustomerForm(forms.Form):
     phone = forms.CharField(max_length=20, required=False, label='Телефон')
 
 class OrderForm(forms.Form):
-    customer = forms.ChoiceField(label='Покупатель')
+    customer = AutocompleteField('customers', label='Покупатель')
     status = forms.ChoiceField(choices=[
         ('pending', 'В ожидании'),
         ('completed', 'Завершён'),
@@ -57,27 +124,22 @@ class OrderForm(forms.Form):
 
     def __init__(self, *args, **kwargs):
         request = kwargs.pop('request', None)
+        # UpdateView передает объект API (dict); шаблон формы использует form.instance.id
+        self.instance = kwargs.pop('instance', None)
         super().__init__(*args, **kwargs)
         if request:
-            customers_data = api_request('GET', 'customers/', request)
-            self.fields['customer'].choices = [(str(cust['id']), f"{cust['first_name']} {cust['last_name']}") for cust in customers_data.get('results', [])] if customers_data else []
-        else:
-            self.fields['customer'].choices = []
+            load_autocomplete_labels(self, request)
 
 class ReviewForm(forms.Form):
-    product = forms.ChoiceField(label='Товар')
-    customer = forms.ChoiceField(label='Покупатель')
+    product = AutocompleteField('products', label='Товар')
+    customer = AutocompleteField('customers', label='Покупатель')
     rating = forms.IntegerField(min_value=1, max_value=5, label='Оценка')
     comment = forms.CharField(widget=forms.Textarea, label='Комментарий')
 
     def __init__(self, *args, **kwargs):
         request = kwargs.pop('request', None)
+        # UpdateView передает объект API (dict); шаблон формы использует form.instance.id
+        self.instance = kwargs.pop('instance', None)
         super().__init__(*args, **kwargs)
         if request:
-            products_data = api_request('GET', 'products/', request)
-            self.fields['product'].choices = [(str(prod['id']), prod['name']) for prod in products_data.get('results', [])] if products_data else []
-            customers_data = api_request('GET', 'customers/', request)
-            self.fields['customer'].choices = [(str(cust['id']), f"{cust['first_name']} {cust['last_name']}") for cust in customers_data.get('results', [])] if customers_data else []
-        else:
-            self.fields['product'].choices = []
-            self.fields['customer'].choices = []
\ No newline at end of file
+            load_autocomplete_labels(self, request)
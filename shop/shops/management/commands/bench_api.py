@@ -0,0 +1,74 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+
+TRANSPORTS = {
+    'local': 'shops.transports.LocalTransport',
+    'http': 'shops.transports.HttpTransport',
+}
+PAGES = {
+    'home': '/',
+    'all_products': '/all-products/',
+    'cart': '/cart/',
+    'admin_orders': '/admin/orders/',
+}
+
+
+class Command(BaseCommand):
+    help = 'Замер задержки и числа SQL-запросов страниц витрины для разных транспортов api_request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transport', action='append', choices=TRANSPORTS, help='local и/или http (по умолчанию оба)')
+        parser.add_argument('--page', action='append', choices=PAGES, help='Страницы для замера (по умолчанию все)')
+        parser.add_argument('-n', '--requests', type=int, default=50, help='Число запросов на страницу')
+        parser.add_argument('--username', help='Пользователь для страниц, требующих входа (cart, admin_orders)')
+
+    def handle(self, *args, **options):
+        transports = options['transport'] or list(TRANSPORTS)
+        pages = options['page'] or list(PAGES)
+        user = None
+        if options['username']:
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(f"Пользователь {options['username']} не найден")
+        elif 'cart' in pages or 'admin_orders' in pages:
+            self.stdout.write('cart, admin_orders: без --username будет замерен только редирект на вход')
+
+        self.stdout.write(f"{'transport':<10} {'page':<14} {'mean, ms':>10} {'p50, ms':>10} {'p95, ms':>10} {'SQL cold/warm':>14}")
+        for name in transports:
+            with override_settings(API_TRANSPORT=TRANSPORTS[name]):
+                client = Client(HTTP_HOST='127.0.0.1')
+                if user:
+                    client.force_login(user)
+                    # Токен в сессии — как после входа через custom_login: вызовы API аутентифицированы.
+                    session = client.session
+                    session['api_token'] = Token.objects.get_or_create(user=user)[0].key
+                    session.save()
+                for page in pages:
+                    timings, queries = self.measure(client, PAGES[page], options['requests'])
+                    timings.sort()
+                    p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+                    self.stdout.write(
+                        f"{name:<10} {page:<14} {statistics.mean(timings):>10.2f} "
+                        f"{statistics.median(timings):>10.2f} {p95:>10.2f} {queries:>14}"
+                    )
+
+    def measure(self, client, url, count):
+        with CaptureQueriesContext(connection) as captured:
+            client.get(url)  # прогрев
+        cold_queries = len(captured)
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        with CaptureQueriesContext(connection) as captured:
+            client.get(url)
+        return timings, f'{cold_queries}/{len(captured)}'
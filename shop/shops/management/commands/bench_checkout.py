@@ -0,0 +1,74 @@
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from shops.models import Category, Order, OrderItem, Product
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочная проверка api/checkout/: параллельные покупки одного товара с ограниченным остатком'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='Пользователь с профилем покупателя')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--orders', type=int, default=100, help='Всего попыток оформить заказ')
+        parser.add_argument('--stock', type=int, default=50, help='Начальный остаток тестового товара')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Пользователь {options['username']} не найден")
+        category = Category.objects.first()
+        if category is None:
+            raise CommandError('Нужна хотя бы одна категория')
+        token, _ = Token.objects.get_or_create(user=user)
+        product = Product.objects.create(
+            name='Нагрузочный тест', slug=f'bench-checkout-{uuid.uuid4().hex[:12]}',
+            description='', price=1, stock=options['stock'], category=category,
+        )
+        statuses = Counter()
+        order_ids = []
+        lock = threading.Lock()
+
+        def worker(count):
+            client = APIClient(HTTP_HOST='127.0.0.1')
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+            try:
+                for _ in range(count):
+                    response = client.post('/api/checkout/', {'items': [{'product': product.id, 'quantity': 1}]}, format='json')
+                    with lock:
+                        statuses[response.status_code] += 1
+                        if response.status_code == 201:
+                            order_ids.append(response.json()['id'])
+            finally:
+                connection.close()
+
+        threads = options['threads']
+        per_thread = [options['orders'] // threads + (1 if i < options['orders'] % threads else 0) for i in range(threads)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(worker, per_thread))
+        elapsed = time.perf_counter() - start
+
+        product.refresh_from_db()
+        sold = OrderItem.objects.filter(product=product).aggregate(total=Sum('quantity'))['total'] or 0
+        self.stdout.write(f"Попыток: {options['orders']}, потоков: {threads}, время: {elapsed:.2f} с, "
+                          f"{options['orders'] / elapsed:.1f} запросов/с")
+        self.stdout.write(f"Ответы: {dict(statuses)}")
+        self.stdout.write(f"Продано: {sold}, остаток: {product.stock}, начальный остаток: {options['stock']}")
+
+        Order.objects.filter(id__in=order_ids).delete()
+        product.delete()
+        if sold + product.stock != options['stock'] or sold != statuses[201]:
+            raise CommandError('Несогласованность остатков: продано больше, чем было на складе')
+        self.stdout.write(self.style.SUCCESS('Остатки согласованы, перепродаж нет'))
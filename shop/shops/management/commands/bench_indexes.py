@@ -0,0 +1,146 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from shops.models import Category, Customer, Order, OrderItem, Product, Review
+
+# Индексы под реальные запросы (shops.models, Meta.indexes); --compare удаляет их на время замера.
+INDEXES = [
+    'product_category_id_idx',
+    'product_category_price_idx',
+    'product_category_stock_idx',
+    'order_status_created_idx',
+    'order_created_idx',
+    'orderitem_order_product_idx',
+    'review_created_idx',
+]
+BATCH_SIZE = 5000
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def fixed_created_at(*models):
+    # auto_now_add перезаписывает created_at; для правдоподобных данных даты задаются явно.
+    fields = [model._meta.get_field('created_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Планы (EXPLAIN) и задержки основных запросов витрины и админки на сгенерированных данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=20000)
+        parser.add_argument('--orders', type=int, default=50000)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('-n', '--repeat', type=int, default=20, help='Повторов каждого запроса')
+        parser.add_argument('--compare', action='store_true', help='Повторить замер без индексов из INDEXES')
+        parser.add_argument('--keep', action='store_true', help='Не откатывать сгенерированные данные')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options)
+                self.report('С индексами', options['repeat'])
+                if options['compare']:
+                    sid = transaction.savepoint()
+                    with connection.cursor() as cursor:
+                        for name in INDEXES:
+                            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+                    self.analyze()
+                    self.report('Без индексов', options['repeat'])
+                    transaction.savepoint_rollback(sid)
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write('Сгенерированные данные откачены')
+
+    def seed(self, options):
+        start = time.perf_counter()
+        tag = f'bench-{int(time.time())}'
+        categories = Category.objects.bulk_create([
+            Category(name=f'Категория {i}', slug=f'{tag}-c{i}') for i in range(options['categories'])
+        ])
+        Product.objects.bulk_create((
+            Product(
+                name=f'Товар {i}', slug=f'{tag}-p{i}', description='', category=random.choice(categories),
+                price=Decimal(random.randint(100, 100000)) / 100, stock=random.randint(0, 500),
+            ) for i in range(options['products'])
+        ), batch_size=BATCH_SIZE)
+        product_ids = list(Product.objects.filter(slug__startswith=tag).values_list('id', flat=True))
+        customers = Customer.objects.bulk_create([
+            Customer(first_name=f'Покупатель {i}', email=f'{tag}-{i}@example.com') for i in range(1000)
+        ])
+        now = timezone.now()
+        with fixed_created_at(Order, Review):
+            Order.objects.bulk_create((
+                Order(
+                    customer=random.choice(customers), status=random.choice(['pending', 'completed', 'cancelled']),
+                    created_at=now - timedelta(minutes=random.randint(0, 525600)),
+                ) for _ in range(options['orders'])
+            ), batch_size=BATCH_SIZE)
+            order_ids = list(Order.objects.filter(customer__in=customers).values_list('id', flat=True))
+            OrderItem.objects.bulk_create((
+                OrderItem(order_id=order_id, product_id=random.choice(product_ids), quantity=1, price=1)
+                for order_id in order_ids for _ in range(2)
+            ), batch_size=BATCH_SIZE)
+            Review.objects.bulk_create((
+                Review(
+                    product_id=random.choice(product_ids), customer=random.choice(customers), rating=5, comment='',
+                    created_at=now - timedelta(minutes=random.randint(0, 525600)),
+                ) for _ in range(options['reviews'])
+            ), batch_size=BATCH_SIZE)
+        self.analyze()
+        self.sample = {
+            'category': categories[0],
+            'order': Order.objects.filter(id__in=order_ids[:1]).first(),
+            'product': Product.objects.get(pk=product_ids[0]),
+            'email': customers[-1].email,
+        }
+        self.stdout.write(f'Данные сгенерированы за {time.perf_counter() - start:.1f} с')
+
+    def analyze(self):
+        # Статистика планировщика должна учитывать свежие данные и набор индексов.
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def queries(self):
+        sample = self.sample
+        return {
+            'Заказы по статусу, -created_at': Order.objects.filter(status='pending').order_by('-created_at')[:20],
+            'Заказы, курсор (-created_at, -id)': Order.objects.order_by('-created_at', '-id')[:20],
+            'Отзывы, курсор (-created_at, -id)': Review.objects.order_by('-created_at', '-id')[:20],
+            'Строка заказа (order, product)': OrderItem.objects.filter(order=sample['order'], product=sample['product']),
+            'Товары категории по id': Product.objects.filter(category=sample['category']).order_by('id')[:20],
+            'Товары категории по цене': Product.objects.filter(category=sample['category']).order_by('price')[:20],
+            'Товары категории по остатку': Product.objects.filter(category=sample['category']).order_by('-stock')[:20],
+            'Покупатель по email': Customer.objects.filter(email=sample['email']),
+        }
+
+    def report(self, title, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in self.queries().items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(f'{name}: p50 {statistics.median(timings):.2f} мс, max {max(timings):.2f} мс')
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'    {line}')
@@ -0,0 +1,116 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import DecimalField, Sum, Value
+from django.db.models.functions import Coalesce
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api_store.fast import compile_serializer
+from api_store.renderers import FastJSONRenderer
+from api_store.serializers import CategorySerializer, OrderSerializer, ProductSerializer
+from shops.models import Category, Customer, Order, OrderItem, Product
+
+ROWS = 100  # max_page_size списков API
+
+
+class Rollback(Exception):
+    pass
+
+
+def cases():
+    # Запросы — как в соответствующих viewset (api_store.views); сначала — сгенерированные строки
+    return {
+        'products': (ProductSerializer, Product.objects.order_by('-id')),
+        'categories': (CategorySerializer, Category.objects.order_by('-id')),
+        'orders': (OrderSerializer, Order.objects.order_by('-id').annotate(
+            total=Coalesce(Sum('items__price'), Value(0), output_field=DecimalField())
+        )),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Микробенчмарк сериализации страницы списка: ModelSerializer(many=True) '
+        'против api_store.fast (values() + RowSerializer) и JSONRenderer против '
+        'FastJSONRenderer, строк в секунду. '
+        'Данные создаются во временной транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=ROWS, help='Строк на странице')
+        parser.add_argument('-n', '--repeat', type=int, default=50, help='Повторов каждого замера')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        request = Request(APIRequestFactory().get('/api/', HTTP_HOST='127.0.0.1'))
+        try:
+            with transaction.atomic():
+                self.seed(rows)
+                self.stdout.write(
+                    f"{'endpoint':<12} {'path':<22} {'rows/s':>10} {'p50, ms':>9}"
+                )
+                for name, (serializer_class, queryset) in cases().items():
+                    queryset = queryset[:rows]
+                    serializer = serializer_class(context={'request': request})
+                    fast = compile_serializer(serializer, queryset)
+                    if fast is None:
+                        raise CommandError(f'{name}: сериализатор не поддерживается api_store.fast')
+                    old = serializer_class(queryset, many=True, context={'request': request}).data
+                    new = [fast.to_representation(row) for row in fast.values(queryset)]
+                    if [dict(row) for row in old] != new:
+                        raise CommandError(f'{name}: вывод быстрого пути отличается от ModelSerializer')
+
+                    instances = list(queryset)
+                    values = list(fast.values(queryset))
+                    native = [compile_serializer(serializer, queryset, native=True).to_representation(row) for row in values]
+                    if FastJSONRenderer().render(native) != JSONRenderer().render(old):
+                        raise CommandError(f'{name}: FastJSONRenderer отличается от JSONRenderer')
+                    paths = {
+                        # Запрос + сериализация — как в list()
+                        'ModelSerializer': lambda: serializer_class(queryset.all(), many=True, context={'request': request}).data,
+                        'fast': lambda: [fast.to_representation(row) for row in fast.values(queryset)],
+                        # Только сериализация уже загруженных строк
+                        'ModelSerializer (CPU)': lambda: serializer_class(instances, many=True, context={'request': request}).data,
+                        'fast (CPU)': lambda: [fast.to_representation(row) for row in values],
+                        # Кодирование готовой страницы (api_store.encoding, settings.API_JSON_BACKEND)
+                        'JSONRenderer': lambda: JSONRenderer().render(old),
+                        'FastJSONRenderer': lambda: FastJSONRenderer().render(native),
+                    }
+                    for path, run in paths.items():
+                        timings = self.measure(run, repeat)
+                        p50 = statistics.median(timings)
+                        self.stdout.write(f'{name:<12} {path:<22} {len(instances) / p50:>10.0f} {p50 * 1000:>9.2f}')
+                raise Rollback
+        except Rollback:
+            pass
+
+    def measure(self, run, repeat):
+        run()  # прогрев
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    def seed(self, rows):
+        tag = f'bench-{int(time.time())}'
+        categories = Category.objects.bulk_create([
+            Category(name=f'Категория {i}', slug=f'{tag}-c{i}', image=f'categories/{i}.jpg') for i in range(rows)
+        ])
+        Product.objects.bulk_create([
+            Product(
+                name=f'Товар {i}', slug=f'{tag}-p{i}', description='Описание', price=f'{i}.5', stock=i,
+                category=categories[i % len(categories)], main_image=f'products/{i}.jpg',
+            ) for i in range(rows)
+        ])
+        customer = Customer.objects.create(first_name='Покупатель', email=f'{tag}@example.com')
+        orders = Order.objects.bulk_create([Order(customer=customer, status='pending') for _ in range(rows)])
+        product = Product.objects.filter(slug__startswith=tag).first()
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=2, price='3.10') for order in orders for _ in range(2)
+        ])
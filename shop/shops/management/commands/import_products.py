@@ -0,0 +1,108 @@
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api_store.bulk import BulkWriter, bulk_summary
+from api_store.export import FORMULA_PREFIXES, openpyxl
+from api_store.serializers import ProductSerializer
+from api_store.views import ProductViewSet
+
+# Заголовки выгрузки /api/products/export/ -> поля API, чтобы выгруженный файл
+# можно было загрузить обратно. Колонки с именами полей (id, name, price...) тоже подходят.
+EXPORT_HEADERS = {
+    header: lookup[:-3] if lookup.endswith('_id') else lookup
+    for header, lookup in ProductViewSet.export_fields
+    if '__' not in lookup
+}
+ERRORS_SHOWN = 20
+
+
+class Rollback(Exception):
+    pass
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f)
+
+
+def read_xlsx(path):
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:  # при выгрузке длинный список делится на листы
+            rows = sheet.iter_rows(values_only=True)
+            headers = next(rows, None)
+            if headers is None:
+                continue
+            for values in rows:
+                if any(value is not None for value in values):
+                    yield dict(zip(headers, values))
+    finally:
+        workbook.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Импорт товаров из CSV/XLSX тем же конвейером, что и /api/products/bulk/: '
+        'строки с id обновляются, без id — создаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .csv или .xlsx (например, выгрузка /api/products/export/)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Строк в пакете (одна транзакция)')
+        parser.add_argument('--dry-run', action='store_true', help='Проверить и откатить изменения')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            reader = read_csv
+        elif extension == '.xlsx':
+            if openpyxl is None:
+                raise CommandError('Для импорта XLSX нужен openpyxl')
+            reader = read_xlsx
+        else:
+            raise CommandError('Поддерживаются файлы .csv и .xlsx')
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+
+        writer = BulkWriter(ProductSerializer, chunk_size=options['chunk_size'])
+        rows = (self.prepare(row) for row in reader(path))
+        if options['dry_run']:
+            try:
+                with transaction.atomic():
+                    results = writer.save(rows)
+                    raise Rollback
+            except Rollback:
+                self.stdout.write('Пробный запуск: изменения откачены')
+        else:
+            # Без общей транзакции: каждый пакет фиксируется сам (BulkWriter),
+            # и блокировки строк не держатся до конца импорта.
+            results = writer.save(rows)
+
+        summary = bulk_summary(results)
+        errors = [result for result in results if result['status'] == 'error']
+        for result in errors[:ERRORS_SHOWN]:
+            # +2: строка заголовков и нумерация с единицы (для XLSX — сквозной номер строки данных)
+            self.stdout.write(self.style.ERROR(f"Строка {result['index'] + 2}: {result['errors']}"))
+        if len(errors) > ERRORS_SHOWN:
+            self.stdout.write(f'... и еще {len(errors) - ERRORS_SHOWN} строк с ошибками')
+        self.stdout.write(
+            f"Создано: {summary['created']}, обновлено: {summary['updated']}, ошибок: {summary['errors']}"
+        )
+
+    def prepare(self, row):
+        prepared = {}
+        for header, value in row.items():
+            if header is None:
+                continue
+            name = EXPORT_HEADERS.get(header, header)
+            if isinstance(value, str):
+                value = value.strip()
+                # Выгрузка экранирует значения, похожие на формулы, апострофом (export_value)
+                if value.startswith("'") and value[1:].startswith(FORMULA_PREFIXES):
+                    value = value[1:]
+            prepared[name] = value
+        return prepared
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from shops.models import DeletionLog
+
+
+class Command(BaseCommand):
+    help = (
+        'Удалить из журнала удалений записи старше срока хранения. Последняя запись '
+        'каждой модели остается: по ней считается версия модели (shops.cache). '
+        'Клиенты changes/ должны синхронизироваться чаще, иначе пропустят удаления.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'DELETION_LOG_RETENTION_DAYS', 30),
+            help='Срок хранения записей, дней',
+        )
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - timedelta(days=options['days'])
+        latest = DeletionLog.objects.values('model').annotate(last=Max('id')).values_list('last', flat=True)
+        deleted, _ = DeletionLog.objects.filter(deleted_at__lt=threshold).exclude(id__in=list(latest)).delete()
+        self.stdout.write(self.style.SUCCESS(f'Удалено записей журнала: {deleted}'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from shops.models import Product
+from shops.search import get_search_engine
+
+
+class Command(BaseCommand):
+    help = 'Пересчитать поисковый индекс (search_vector) для всех товаров'
+
+    def handle(self, *args, **options):
+        engine = get_search_engine()
+        engine.update(Product.objects.all())
+        self.stdout.write(self.style.SUCCESS(f'Поисковый индекс обновлен ({engine.__class__.__name__})'))
@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+
+
+class SessionRefreshMiddleware:
+    """
+    Продлевает срок жизни сессии не чаще раза в SESSION_REFRESH_INTERVAL секунд
+    вместо SESSION_SAVE_EVERY_REQUEST, который пишет сессию на каждый запрос.
+    Должен стоять после SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.interval = getattr(settings, 'SESSION_REFRESH_INTERVAL', settings.SESSION_COOKIE_AGE // 2)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session = getattr(request, 'session', None)
+        if session is None or session.is_empty() or session.modified:
+            return response
+        now = int(time.time())
+        if now - session.get('_refreshed_at', 0) >= self.interval:
+            session['_refreshed_at'] = now
+        return response
@@ -1,11 +1,15 @@
 from django.db import models
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
+from .search import PrefixSearchIndex, SearchVectorIndex
 
 class Category(models.Model):
     name = models.CharField(max_length=100, verbose_name="Название категории")
     slug = models.SlugField(max_length=100, unique=True, verbose_name="URL-имя")
     image = models.ImageField(upload_to='categories/', blank=True, null=True, verbose_name="Изображение")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Дата изменения")
 
     def __str__(self):
         return self.name
@@ -20,6 +24,8 @@ class Category(models.Model):
 class Manufacturer(models.Model):
     name = models.CharField(max_length=100, verbose_name="Название производителя")
     country = models.CharField(max_length=100, verbose_name="Страна")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Дата изменения")
 
     def __str__(self):
         return self.name
@@ -40,6 +46,9 @@ class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name="Категория")
     manufacturer = models.ForeignKey(Manufacturer, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Производитель")
     main_image = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name="Основное изображение")
+    search_vector = SearchVectorField(null=True, editable=False)  # Обновляется сигналом, см. shops.search
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Дата изменения")
 
     def __str__(self):
         return self.name
@@ -50,6 +59,17 @@ class Product(models.Model):
     class Meta:
         verbose_name = "Товар"
         verbose_name_plural = "Товары"
+        indexes = [
+            # Сортировки API товаров (?ordering=price / -stock / name)
+            models.Index(fields=['price'], name='product_price_idx'),
+            models.Index(fields=['stock'], name='product_stock_idx'),
+            models.Index(fields=['name'], name='product_name_idx'),
+            # Товары категории: фильтр по category и сортировка по id / цене / остатку
+            models.Index(fields=['category', 'id'], name='product_category_id_idx'),
+            models.Index(fields=['category', 'price'], name='product_category_price_idx'),
+            models.Index(fields=['category', 'stock'], name='product_category_stock_idx'),
+            SearchVectorIndex(fields=['search_vector'], name='product_search_idx'),
+        ]
 
 class Customer(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
@@ -57,6 +77,8 @@ class Customer(models.Model):
     last_name = models.CharField(max_length=100, blank=True, verbose_name="Фамилия")  # Сделано необязательным
     email = models.EmailField(unique=True, verbose_name="Email")
     phone = models.CharField(max_length=20, blank=True, verbose_name="Телефон")  # Сделано необязательным
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Дата изменения")
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}".strip()
@@ -67,6 +89,12 @@ class Customer(models.Model):
     class Meta:
         verbose_name = "Покупатель"
         verbose_name_plural = "Покупатели"
+        indexes = [
+            # Автодополнение в формах (customers/autocomplete/): поиск по префиксу
+            PrefixSearchIndex(fields=['first_name'], name='customer_first_name_prefix_idx'),
+            PrefixSearchIndex(fields=['last_name'], name='customer_last_name_prefix_idx'),
+            PrefixSearchIndex(fields=['email'], name='customer_email_prefix_idx'),
+        ]
 
 class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, verbose_name="Покупатель")
@@ -86,12 +114,19 @@ class Order(models.Model):
     class Meta:
         verbose_name = "Заказ"
         verbose_name_plural = "Заказы"
+        indexes = [
+            # Админка заказов: фильтр по статусу и сортировка -created_at; курсор API (-created_at, -id)
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='order_created_idx'),
+        ]
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items', verbose_name="Заказ")
     product = models.ForeignKey(Product, on_delete=models.CASCADE, verbose_name="Товар")
     quantity = models.PositiveIntegerField(verbose_name="Количество")
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Цена")
+    # По нему считается версия продаж (популярные товары, shops.cache.model_state)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Дата изменения")
 
     def __str__(self):
         return f"{self.quantity} x {self.product.name}"
@@ -99,6 +134,9 @@ class OrderItem(models.Model):
     class Meta:
         verbose_name = "Элемент заказа"
         verbose_name_plural = "Элементы заказа"
+        indexes = [
+            models.Index(fields=['order', 'product'], name='orderitem_order_product_idx'),
+        ]
 
 class Review(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews', verbose_name="Товар")
@@ -115,4 +153,24 @@ class Review(models.Model):
 
     class Meta:
         verbose_name = "Отзыв"
-        verbose_name_plural = "Отзывы"
\ No newline at end of file
+        verbose_name_plural = "Отзывы"
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='review_created_idx'),
+        ]
+
+class DeletionLog(models.Model):
+    # Журнал удалений для инкрементальной синхронизации (api_store.mixins.ChangesMixin):
+    # измененные строки находятся по updated_at, удаленные — по этому журналу.
+    model = models.CharField(max_length=50, verbose_name="Модель")
+    object_id = models.PositiveIntegerField(verbose_name="ID объекта")
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Дата удаления")
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id}"
+
+    class Meta:
+        verbose_name = "Удаленный объект"
+        verbose_name_plural = "Удаленные объекты"
+        indexes = [
+            models.Index(fields=['model', 'id'], name='deletionlog_model_id_idx'),
+        ]
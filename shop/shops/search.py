@@ -0,0 +1,104 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Index, Q, TextField, Value, When
+from django.db.models.functions import Cast, Upper
+from django.utils.module_loading import import_string
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query)
+
+
+class SearchVectorIndex(GinIndex):
+    """
+    GIN-индекс по tsvector на PostgreSQL. На других СУБД (SQLite в тестах)
+    создается обычный индекс, чтобы схема оставалась одинаковой.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return Index.create_sql(self, model, schema_editor, using=using, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
+class PrefixSearchIndex(Index):
+    """
+    Индекс для поиска по префиксу без учета регистра (__istartswith).
+    На PostgreSQL — по выражению UPPER(поле::text) с text_pattern_ops, которое
+    Django подставляет в LIKE; на других СУБД — обычный индекс по полю.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+        expressions = [OpClass(Upper(Cast(field, TextField())), name='text_pattern_ops') for field in self.fields]
+        return Index(*expressions, name=self.name).create_sql(model, schema_editor, using=using, **kwargs)
+
+
+class BaseSearchEngine:
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def update(self, queryset):
+        pass
+
+
+class PostgresSearchEngine(BaseSearchEngine):
+    """
+    Полнотекстовый поиск по Product.search_vector: название (вес A) и описание (вес B),
+    морфология словаря settings.SEARCH_CONFIG, результаты упорядочены по рангу.
+    """
+
+    def __init__(self):
+        self.config = getattr(settings, 'SEARCH_CONFIG', 'russian')
+
+    def vector(self):
+        return (
+            SearchVector('name', weight='A', config=self.config)
+            + SearchVector('description', weight='B', config=self.config)
+        )
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        # Префиксный поиск по каждому слову — для поиска по мере ввода.
+        search_query = SearchQuery(' & '.join(f'{term}:*' for term in terms), config=self.config, search_type='raw')
+        return (
+            queryset.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F('search_vector'), search_query))
+            .order_by('-rank', 'id')
+        )
+
+    def update(self, queryset):
+        queryset.update(search_vector=self.vector())
+
+
+class SimpleSearchEngine(BaseSearchEngine):
+    """Запасной вариант для СУБД без полнотекстового поиска (SQLite): icontains по словам."""
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        for term in terms:
+            queryset = queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+        return queryset.annotate(
+            rank=Case(When(name__icontains=query, then=Value(1)), default=Value(0), output_field=IntegerField())
+        ).order_by('-rank', 'id')
+
+
+_engines = {}
+
+
+def get_search_engine():
+    path = getattr(settings, 'SEARCH_ENGINE', None)
+    if path is None:
+        path = 'shops.search.PostgresSearchEngine' if connection.vendor == 'postgresql' else 'shops.search.SimpleSearchEngine'
+    if path not in _engines:
+        _engines[path] = import_string(path)()
+    return _engines[path]
@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .cache import invalidate_model_state
+from .models import Order, OrderItem, Product
+
+
+class CheckoutError(Exception):
+    """Заказ не может быть оформлен (нет товара, недостаточно остатка)."""
+
+
+def popular_product_ids(limit):
+    # Самые продаваемые товары по суммарному количеству в заказах;
+    # если продаж меньше limit, список дополняется товарами с наибольшим остатком.
+    sold = (
+        OrderItem.objects.values('product')
+        .annotate(sold=Sum('quantity'))
+        .order_by('-sold', 'product')[:limit]
+    )
+    ids = [row['product'] for row in sold]
+    if len(ids) < limit:
+        rest = Product.objects.exclude(id__in=ids).order_by('-stock', 'id')
+        ids += list(rest.values_list('id', flat=True)[:limit - len(ids)])
+    return ids
+
+
+def place_order(customer, quantities):
+    """
+    Оформляет заказ одной транзакцией: списывает остатки условным UPDATE
+    (stock >= quantity) и создает Order со всеми OrderItem через bulk_create.
+    quantities — {product_id: quantity}. При нехватке товара вызывает CheckoutError,
+    транзакция откатывается целиком.
+    """
+    with transaction.atomic():
+        products = Product.objects.in_bulk(quantities.keys())
+        # Списание в порядке id, чтобы параллельные заказы брали блокировки строк одинаково.
+        for product_id in sorted(quantities):
+            product = products.get(product_id)
+            if product is None:
+                raise CheckoutError(f'Товар #{product_id} не найден.')
+            # update() не трогает auto_now, а по updated_at считается версия товаров (shops.cache)
+            updated = Product.objects.filter(pk=product_id, stock__gte=quantities[product_id]).update(
+                stock=F('stock') - quantities[product_id], updated_at=timezone.now(),
+            )
+            if not updated:
+                raise CheckoutError(f'Недостаточно товара {product.name} на складе.')
+        order = Order.objects.create(customer=customer, status='pending')
+        items = OrderItem.objects.bulk_create([
+            # В price хранится сумма по строке, как и при оформлении через витрину.
+            OrderItem(order=order, product_id=product_id, quantity=quantity, price=products[product_id].price * quantity)
+            for product_id, quantity in quantities.items()
+        ])
+        # update() и bulk_create не отправляют сигналов
+        invalidate_model_state('product', 'orderitem')
+    return order, items
@@ -0,0 +1,37 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .cache import invalidate_model_state
+from .search import get_search_engine
+from .models import Category, Customer, DeletionLog, Manufacturer, OrderItem, Product
+
+# Модели с updated_at: их удаления записываются в DeletionLog для синхронизации
+# и версий кэша (shops.cache.model_state).
+TRACKED_MODELS = [Category, Manufacturer, Product, Customer, OrderItem]
+
+
+def update_search_vector(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'name', 'description'} & set(update_fields):
+        return
+    get_search_engine().update(Product.objects.filter(pk=instance.pk))
+
+
+post_save.connect(update_search_vector, sender=Product, dispatch_uid='update_product_search_vector')
+
+
+def log_deletion(sender, instance, **kwargs):
+    DeletionLog.objects.create(model=sender._meta.model_name, object_id=instance.pk)
+
+
+for model in TRACKED_MODELS:
+    post_delete.connect(log_deletion, sender=model, dispatch_uid=f'log_deletion_{model._meta.model_name}')
+
+
+def reset_model_state(sender, **kwargs):
+    invalidate_model_state(sender._meta.model_name)
+
+
+for model in apps.get_app_config('shops').get_models():
+    if model is not DeletionLog:
+        post_save.connect(reset_model_state, sender=model, dispatch_uid=f'reset_state_save_{model._meta.model_name}')
+        post_delete.connect(reset_model_state, sender=model, dispatch_uid=f'reset_state_delete_{model._meta.model_name}')
@@ -1,3 +1,277 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .cache import model_state_key
+from .forms import AutocompleteField
+from api_store.bulk import BulkWriter
+
+from .models import Category, Customer, DeletionLog, Manufacturer, Order, OrderItem, Product, Review
+from .transports import HttpTransport, LocalTransport, httpx
+
+
+def create_rows(rows):
+    # У каждой строки свои связанные объекты, иначе N+1 скрыл бы кэш связей.
+    for i in range(rows):
+        category = Category.objects.create(name=f'Категория {i}', slug=f'c{i}')
+        manufacturer = Manufacturer.objects.create(name=f'Производитель {i}', country='RU')
+        product = Product.objects.create(
+            name=f'Товар {i}', slug=f'p{i}', description='', price=1, stock=1,
+            category=category, manufacturer=manufacturer,
+        )
+        customer = Customer.objects.create(first_name=f'Покупатель {i}', email=f'buyer-{i}@example.com')
+        order = Order.objects.create(customer=customer, status='pending')
+        OrderItem.objects.create(order=order, product=product, quantity=1, price=1)
+        Review.objects.create(product=product, customer=customer, rating=5, comment='')
+
+
+def expire_model_state():
+    # Как по истечении MODEL_STATE_TIMEOUT: версии перечитываются из БД
+    cache.delete_many([model_state_key(name) for name in ('category', 'product', 'manufacturer', 'customer', 'orderitem')])
+
+
+def count_queries(test, client, url):
+    client.get(url)  # прогрев кэшей (сессия, права)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    test.assertEqual(response.status_code, 200, url)
+    return len(queries)
+
+
+class LogoutTests(TestCase):
+    def test_logout_revokes_api_token(self):
+        user = User.objects.create_user('buyer', 'buyer@example.com', 'pass12345')
+        self.client.post('/login/', {'username': 'buyer', 'password': 'pass12345'})
+        token = self.client.session['api_token']
+        self.assertTrue(Token.objects.filter(key=token, user=user).exists())
+
+        self.client.get('/logout/')
+        self.assertFalse(Token.objects.filter(user=user).exists())
+        self.assertNotIn('api_token', self.client.session)
+
+
+class CatalogPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Хлеб', slug='bread')
+        Product.objects.create(
+            name='Батон', slug='baton', description='', price=Decimal('50.00'), stock=5, category=self.category,
+        )
+
+    def test_not_modified_until_catalogue_changes(self):
+        response = self.client.get('/categories/')
+        self.assertContains(response, 'Хлеб')
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/categories/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # update() не отправляет сигналов: версия каталога перечитывается из БД
+        # по истечении MODEL_STATE_TIMEOUT
+        Category.objects.filter(pk=self.category.pk).update(name='Выпечка', updated_at=timezone.now())
+        self.assertEqual(self.client.get('/categories/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        expire_model_state()
+        response = self.client.get('/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Выпечка')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_deletion_invalidates_page(self):
+        other = Category.objects.create(name='Молоко', slug='milk')
+        self.assertContains(self.client.get('/categories/'), 'Молоко')
+        Category.objects.filter(pk=other.pk).delete()
+        self.assertNotContains(self.client.get('/categories/'), 'Молоко')
+
+    def test_version_does_not_depend_on_process_cache(self):
+        etag = self.client.get('/categories/')['ETag']
+        # Другой воркер — свой кэш; версия и ETag у него те же
+        cache.clear()
+        self.assertEqual(self.client.get('/categories/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_product_change_invalidates_category_page(self):
+        self.assertContains(self.client.get('/categories/bread/'), 'Батон')
+        Product.objects.filter(slug='baton').update(name='Багет', updated_at=timezone.now())
+        expire_model_state()
+        self.assertContains(self.client.get('/categories/bread/'), 'Багет')
+
+    def test_if_modified_since_alone_does_not_give_304(self):
+        # Секундной точности Last-Modified недостаточно: решает только ETag
+        response = self.client.get('/categories/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+
+class AdminQueryCountTests(TestCase):
+    # Число запросов списков админки не должно зависеть от числа строк на странице
+    rows = 20
+
+    def setUp(self):
+        create_rows(self.rows)
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        user.groups.add(Group.objects.get_or_create(name='ViewAndEdit')[0])
+        self.client.force_login(user)
+
+    def test_changelists(self):
+        for model, model_admin in admin.site._registry.items():
+            url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+            counts = []
+            for per_page in (1, self.rows):
+                with mock.patch.object(model_admin, 'list_per_page', per_page):
+                    counts.append(count_queries(self, self.client, url))
+            with self.subTest(url=url):
+                self.assertEqual(counts[0], counts[1])
+
+
+class LocalTransportTests(TestCase):
+    def setUp(self):
+        Category.objects.create(name='Хлеб', slug='bread')
+        user = User.objects.create_user('staff', password='pass12345', is_staff=True)
+        user.groups.add(Group.objects.get_or_create(name='ViewAndEdit')[0])
+        self.headers = {'Authorization': f'Token {Token.objects.create(user=user).key}'}
+        self.transport = LocalTransport()
+
+    def test_regular_response(self):
+        response = self.transport.request('GET', 'categories/', {})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['slug'], 'bread')
+
+    def test_streaming_responses(self):
+        response = self.transport.request('GET', 'categories/?format=ndjson', {})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([json.loads(line)['slug'] for line in response.content.splitlines()], ['bread'])
+        response = self.transport.request('GET', 'customers/export/?type=csv', self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.decode('utf-8').startswith('\ufeff'))
+
+
+@unittest.skipIf(httpx is None, 'httpx не установлен')
+class HttpTransportAsyncTests(TestCase):
+    def setUp(self):
+        self.sent = []
+        self.clients = []
+        self.transport = HttpTransport()
+        self.transport.new_async_client = self.new_async_client
+
+    def new_async_client(self):
+        def handler(request):
+            self.sent.append(request)
+            return httpx.Response(201, json={'id': 1})
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        self.clients.append(client)
+        return client
+
+    async def test_multipart_with_decimal_fields(self):
+        files = {'main_image': ('bread.jpg', io.BytesIO(b'image'), 'image/jpeg')}
+        data = {'name': 'Батон', 'price': Decimal('10.50'), 'stock': 5, 'manufacturer': None}
+        response = await self.transport.arequest('POST', 'products/', {}, data=data, files=files)
+        self.assertEqual(response.status_code, 201)
+        body = self.sent[0].read()
+        self.assertIn(b'10.50', body)
+        self.assertIn(b'name="main_image"; filename="bread.jpg"', body)
+        self.assertNotIn(b'name="manufacturer"', body)
+
+    async def test_client_closed_under_wsgi(self):
+        request = RequestFactory().get('/')
+        await self.transport.arequest('GET', 'products/', {}, request=request)
+        await self.transport.arequest('GET', 'products/', {}, request=request)
+        self.assertEqual(len(self.clients), 2)
+        self.assertTrue(all(client.is_closed for client in self.clients))
+
+    async def test_client_shared_under_asgi(self):
+        request = AsyncRequestFactory().get('/')
+        await self.transport.arequest('GET', 'products/', {}, request=request)
+        await self.transport.arequest('GET', 'products/', {}, request=request)
+        self.assertEqual(len(self.clients), 1)
+        self.assertFalse(self.clients[0].is_closed)
+        await self.clients[0].aclose()
+
+
+class DeletionLogTests(TestCase):
+    def test_prune_keeps_latest_entry_per_model(self):
+        for name in ('Хлеб', 'Молоко', 'Сыр'):
+            Category.objects.create(name=name, slug=name).delete()
+        Manufacturer.objects.create(name='Пекарня', country='RU').delete()
+        DeletionLog.objects.update(deleted_at=timezone.now() - timedelta(days=40))
+        Category.objects.create(name='Чай', slug='tea').delete()
+        recent = DeletionLog.objects.latest('id')
+        latest_manufacturer = DeletionLog.objects.get(model='manufacturer')
+        call_command('prune_deletion_log', days=30, stdout=io.StringIO())
+        self.assertEqual(set(DeletionLog.objects.values_list('id', flat=True)), {recent.id, latest_manufacturer.id})
+
+
+class ImportProductsTests(TransactionTestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Хлеб', slug='bread')
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('name,slug,description,price,stock,category\n')
+            for i in range(5):
+                f.write(f'Товар {i},product-{i},Описание,1.50,3,{self.category.id}\n')
+        self.addCleanup(os.remove, self.path)
+
+    def run_import(self, *args):
+        in_transaction = []
+        create_chunk = BulkWriter.create_chunk
+
+        def spy(writer, chunk):
+            in_transaction.append(connection.in_atomic_block)
+            return create_chunk(writer, chunk)
+
+        with mock.patch.object(BulkWriter, 'create_chunk', spy):
+            call_command('import_products', self.path, '--chunk-size=2', *args, stdout=io.StringIO())
+        return in_transaction
+
+    def test_chunks_commit_separately(self):
+        # Пакеты не вложены в общую транзакцию
+        self.assertEqual(self.run_import(), [False, False, False])
+        self.assertEqual(Product.objects.count(), 5)
+
+    def test_dry_run_rolls_back(self):
+        self.assertEqual(self.run_import('--dry-run'), [True, True, True])
+        self.assertFalse(Product.objects.exists())
+
+    def test_export_escaping_undone(self):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f"'-50% скидка,sale,Описание,1.50,3,{self.category.id}\n")
+        self.run_import()
+        self.assertEqual(Product.objects.get(slug='sale').name, '-50% скидка')
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        Customer.objects.create(first_name='Иван', last_name='Петров', email='petrov@example.com')
+        user = User.objects.create_user('staff', 'staff@example.com', 'pass12345', is_staff=True)
+        user.groups.add(Group.objects.get_or_create(name='ViewAndEdit')[0])
+        self.client.post('/login/', {'username': 'staff', 'password': 'pass12345'})
+
+    def test_proxy(self):
+        response = self.client.get('/admin/autocomplete/customers/', {'q': 'Иван'})
+        self.assertEqual([row['label'] for row in response.json()], ['Иван Петров'])
+        self.assertEqual(self.client.get('/admin/autocomplete/orders/', {'q': '1'}).status_code, 404)
+
+    def test_proxy_staff_only(self):
+        User.objects.create_user('buyer', 'buyer@example.com', 'pass12345')
+        self.client.post('/login/', {'username': 'buyer', 'password': 'pass12345'})
+        self.assertEqual(self.client.get('/admin/autocomplete/customers/', {'q': 'Иван'}).status_code, 404)
+
+    def test_field_label(self):
+        field = AutocompleteField('customers')
+        customer = Customer.objects.get()
+        request = RequestFactory().get('/')
+        request.session = self.client.session
+        field.load_label(request, customer.id)
+        self.assertEqual(field.widget.label, f'Иван Петров (#{customer.id})')
+        self.assertIn(f'value="{customer.id}"', field.widget.render('customer', customer.id))
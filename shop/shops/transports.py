@@ -0,0 +1,340 @@
+import asyncio
+import json
+import threading
+import weakref
+from collections import Counter
+from importlib import import_module
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIRequest
+from django.core.handlers.exception import response_for_exception
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.test.client import RequestFactory, encode_multipart
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+
+from api_store.encoding import loads as json_loads
+
+try:
+    import httpx
+except ImportError:  # без httpx асинхронные HTTP-вызовы выполняются в пуле потоков
+    httpx = None
+
+BOUNDARY = 'ShopInternalBoundary'
+MULTIPART_CONTENT = 'multipart/form-data; boundary=%s' % BOUNDARY
+
+DEFAULT_HTTP_POOL = {
+    'pool_connections': 10,
+    'pool_maxsize': 20,
+    'pool_block': True,
+    'retries': 2,
+    'backoff_factor': 0.2,
+    'retry_statuses': (502, 503, 504),
+    'retry_methods': ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'),
+}
+
+
+class ApiError(Exception):
+    """Транспорт не смог выполнить запрос (таймаут, обрыв соединения и т.п.)."""
+
+
+class ApiResponse:
+    def __init__(self, status_code, content, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def json(self):
+        # Тот же декодер, что у API (orjson, если установлен)
+        return json_loads(self.content) if self.content else None
+
+
+class BaseTransport:
+    """Выполняет запрос к API и возвращает ApiResponse."""
+
+    def request(self, method, endpoint, headers, data=None, files=None, request=None):
+        raise NotImplementedError
+
+    async def arequest(self, method, endpoint, headers, data=None, files=None, request=None):
+        """
+        Асинхронный вызов для shops.utils.aapi_request. По умолчанию — синхронный
+        request() в пуле потоков (thread_sensitive=False), чтобы одновременные
+        вызовы действительно шли параллельно.
+        """
+        return await sync_to_async(self.request_in_thread, thread_sensitive=False)(
+            method, endpoint, headers, data=data, files=files, request=request,
+        )
+
+    def request_in_thread(self, *args, **kwargs):
+        try:
+            return self.request(*args, **kwargs)
+        finally:
+            # У потока пула свое соединение с БД; закрывается, как в конце обычного запроса.
+            close_old_connections()
+
+
+class PoolStats:
+    """Счетчики пула соединений HTTP-транспорта (общие для процесса)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = Counter()
+
+    def incr(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def snapshot(self):
+        with self.lock:
+            counters = dict(self.counters)
+        checkouts = counters.get('checkouts', 0)
+        new_connections = counters.get('new_connections', 0)
+        return {
+            'requests': counters.get('requests', 0),
+            'hits': checkouts - new_connections,
+            'new_connections': new_connections,
+            'waits': counters.get('waits', 0),
+            'retries': counters.get('retries', 0),
+        }
+
+
+pool_stats = PoolStats()
+
+
+class StatsPoolMixin:
+    def _get_conn(self, timeout=None):
+        # Пустая очередь при блокирующем пуле означает ожидание свободного соединения.
+        if self.block and self.pool is not None and self.pool.empty():
+            pool_stats.incr('waits')
+        pool_stats.incr('checkouts')
+        return super()._get_conn(timeout)
+
+    def _new_conn(self):
+        pool_stats.incr('new_connections')
+        return super()._new_conn()
+
+
+class StatsHTTPConnectionPool(StatsPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class StatsHTTPSConnectionPool(StatsPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class StatsRetry(Retry):
+    def increment(self, *args, **kwargs):
+        pool_stats.incr('retries')
+        return super().increment(*args, **kwargs)
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': StatsHTTPConnectionPool,
+            'https': StatsHTTPSConnectionPool,
+        }
+
+
+class HttpTransport(BaseTransport):
+    """
+    Обращение к API по HTTP — для раздельного развертывания витрины и API.
+    Одна сессия requests на процесс: keep-alive, ограничение соединений на хост
+    и повтор идемпотентных запросов с экспоненциальной задержкой.
+    arequest — через httpx: общий AsyncClient под ASGI, клиент на вызов под WSGI.
+    """
+
+    def __init__(self):
+        pool = self.pool = {**DEFAULT_HTTP_POOL, **getattr(settings, 'API_HTTP_POOL', {})}
+        retry = StatsRetry(
+            total=pool['retries'],
+            backoff_factor=pool['backoff_factor'],
+            status_forcelist=pool['retry_statuses'],
+            allowed_methods=pool['retry_methods'],
+            raise_on_status=False,
+        )
+        adapter = PooledHTTPAdapter(
+            pool_connections=pool['pool_connections'],
+            pool_maxsize=pool['pool_maxsize'],
+            pool_block=pool['pool_block'],
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        timeouts = getattr(settings, 'API_TIMEOUTS', {})
+        self.default_timeout = timeouts.get('default', 5)
+        # Самый длинный префикс проверяется первым.
+        self.timeouts = sorted(
+            ((prefix, value) for prefix, value in timeouts.items() if prefix != 'default'),
+            key=lambda item: len(item[0]), reverse=True,
+        )
+        self.async_clients = weakref.WeakKeyDictionary()
+
+    def get_timeout(self, endpoint):
+        endpoint = endpoint.lstrip('/')
+        for prefix, value in self.timeouts:
+            if endpoint.startswith(prefix.lstrip('/')):
+                return value
+        return self.default_timeout
+
+    def build_kwargs(self, endpoint, headers, data=None, files=None):
+        kwargs = {'headers': dict(headers)}
+        if files:
+            # Поля формы — строками, как их кодирует requests (None пропускается);
+            # httpx не принимает в multipart Decimal и другие нестроковые значения.
+            kwargs['data'] = {key: str(value) for key, value in (data or {}).items() if value is not None}
+            kwargs['files'] = files
+        elif data is not None:
+            kwargs['data'] = json.dumps(data, cls=DjangoJSONEncoder)
+            kwargs['headers']['Content-Type'] = 'application/json'
+        return kwargs
+
+    def request(self, method, endpoint, headers, data=None, files=None, request=None):
+        url = f"{settings.API_BASE_URL}/{endpoint.lstrip('/')}"
+        kwargs = self.build_kwargs(endpoint, headers, data=data, files=files)
+        pool_stats.incr('requests')
+        try:
+            response = self.session.request(method, url, timeout=self.get_timeout(endpoint), **kwargs)
+        except requests.Timeout:
+            raise ApiError(f"Timeout for {method} {url}")
+        except requests.RequestException as e:
+            raise ApiError(str(e))
+        return ApiResponse(response.status_code, response.content, response.headers)
+
+    def new_async_client(self):
+        limits = httpx.Limits(
+            max_connections=self.pool['pool_maxsize'],
+            max_keepalive_connections=self.pool['pool_maxsize'],
+        )
+        return httpx.AsyncClient(limits=limits)
+
+    def get_async_client(self):
+        # AsyncClient привязан к циклу событий: под ASGI-сервером цикл один на процесс,
+        # и клиент (с пулом соединений) живет столько же, сколько процесс.
+        loop = asyncio.get_running_loop()
+        client = self.async_clients.get(loop)
+        if client is None:
+            client = self.async_clients[loop] = self.new_async_client()
+        return client
+
+    def get_async_timeout(self, endpoint):
+        timeout = self.get_timeout(endpoint)
+        if isinstance(timeout, (tuple, list)):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    async def arequest(self, method, endpoint, headers, data=None, files=None, request=None):
+        if httpx is None:
+            return await super().arequest(method, endpoint, headers, data=data, files=files, request=request)
+        url = f"{settings.API_BASE_URL}/{endpoint.lstrip('/')}"
+        kwargs = self.build_kwargs(endpoint, headers, data=data, files=files)
+        if 'data' in kwargs and not files:
+            kwargs['content'] = kwargs.pop('data')
+        if isinstance(request, ASGIRequest):
+            return await self.send_async(self.get_async_client(), method, url, endpoint, kwargs)
+        # Под WSGI каждый запрос выполняется в своем цикле событий (async_to_sync):
+        # общий клиент создавался бы заново на каждый запрос и не закрывался.
+        # Поэтому клиент — на один вызов, без переиспользования соединений.
+        async with self.new_async_client() as client:
+            return await self.send_async(client, method, url, endpoint, kwargs)
+
+    async def send_async(self, client, method, url, endpoint, kwargs):
+        # Повторы — как у StatsRetry синхронного транспорта: идемпотентные методы,
+        # обрывы соединения и статусы retry_statuses, экспоненциальная задержка.
+        retries = self.pool['retries'] if method in self.pool['retry_methods'] else 0
+        pool_stats.incr('requests')
+        for attempt in range(retries + 1):
+            if attempt:
+                pool_stats.incr('retries')
+                await asyncio.sleep(self.pool['backoff_factor'] * 2 ** (attempt - 1))
+            try:
+                response = await client.request(method, url, timeout=self.get_async_timeout(endpoint), **kwargs)
+            except httpx.TimeoutException:
+                if attempt < retries:
+                    continue
+                raise ApiError(f"Timeout for {method} {url}")
+            except httpx.HTTPError as e:
+                if attempt < retries:
+                    continue
+                raise ApiError(str(e))
+            if response.status_code not in self.pool['retry_statuses'] or attempt == retries:
+                break
+        return ApiResponse(response.status_code, response.content, response.headers)
+
+
+class LocalTransport(BaseTransport):
+    """
+    Вызов представлений api_store в текущем процессе, без сетевого обращения.
+    Запрос проходит URL-резолвер и DRF (аутентификация, права, сериализация),
+    но без TCP-соединения, второго воркера и повторного прохода middleware.
+    """
+
+    def __init__(self):
+        self.factory = RequestFactory()
+        self.prefix = urlparse(settings.API_BASE_URL).path.rstrip('/')
+
+    def build_request(self, method, path, headers, data=None, files=None, request=None):
+        extra = {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()}
+        if request is not None:
+            # Абсолютные URL (например, изображений) строятся от хоста витрины.
+            extra['HTTP_HOST'] = request.get_host()
+            extra['secure'] = request.is_secure()
+        if files:
+            payload = dict(data or {})
+            for field, (name, fileobj, content_type) in files.items():
+                payload[field] = SimpleUploadedFile(name, fileobj.read(), content_type)
+            body, content_type = encode_multipart(BOUNDARY, payload), MULTIPART_CONTENT
+        elif data is not None:
+            body, content_type = json.dumps(data, cls=DjangoJSONEncoder), 'application/json'
+        else:
+            body, content_type = '', 'application/json'
+        internal = self.factory.generic(method, path, body, content_type, **extra)
+        # Как и при HTTP-вызове, у API своя сессия, не связанная с сессией витрины.
+        internal.session = import_module(settings.SESSION_ENGINE).SessionStore()
+        return internal
+
+    def request(self, method, endpoint, headers, data=None, files=None, request=None):
+        path = f"{self.prefix}/{endpoint.lstrip('/')}"
+        internal = self.build_request(method, path, headers, data=data, files=files, request=request)
+        try:
+            match = resolve(internal.path_info)
+        except Resolver404:
+            return ApiResponse(404, b'')
+        try:
+            response = match.func(internal, *match.args, **match.kwargs)
+        except Exception as e:
+            # Тот же ответ и запись в лог, что получил бы HTTP-клиент.
+            response = response_for_exception(internal, e)
+        if hasattr(response, 'render'):
+            response.render()
+        if response.streaming:
+            # StreamingHttpResponse/FileResponse (выгрузки, NDJSON) не имеют content.
+            # response.close() не вызывается: он шлет request_finished, а по нему
+            # закрывается соединение с БД текущего запроса витрины.
+            content = b''.join(response.streaming_content)
+            if getattr(response, 'file_to_stream', None) is not None:
+                response.file_to_stream.close()
+        else:
+            content = response.content
+        return ApiResponse(response.status_code, content, response.headers)
+
+
+_transports = {}
+
+
+def get_transport():
+    path = getattr(settings, 'API_TRANSPORT', 'shops.transports.HttpTransport')
+    if path not in _transports:
+        _transports[path] = import_string(path)()
+    return _transports[path]
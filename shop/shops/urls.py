@@ -8,7 +8,7 @@ from .views import (
     ReviewListView, ReviewCreateView, ReviewUpdateView, ReviewDeleteView,
     RegisterView, AllProductsView, UserManagementView, UserCreateView, UserDeleteView,
     user_update, custom_login, home, about, contacts, find_us, products, categories, category_products,
-    cart, add_to_cart, update_cart, remove_from_cart, create_order, custom_logout
+    cart, add_to_cart, update_cart, remove_from_cart, create_order, custom_logout, autocomplete
 )
 
 urlpatterns = [
@@ -26,6 +26,7 @@ urlpatterns = [
     path('cart/remove/<int:product_id>/', remove_from_cart, name='remove_from_cart'),
     path('order/create/', create_order, name='create_order'),
     path('admin/', AdminMenuView.as_view(), name='admin_dashboard'),
+    path('admin/autocomplete/<str:source>/', autocomplete, name='autocomplete'),
     path('admin/categories/', CategoryListView.as_view(), name='category_crud'),
     path('admin/categories/create/', CategoryCreateView.as_view(), name='category_create'),
     path('admin/categories/update/<slug:slug>/', CategoryUpdateView.as_view(), name='category_update'),
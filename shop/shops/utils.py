@@ -1,24 +1,130 @@
-import requests
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+
 from django.conf import settings
 
-def api_request(method, endpoint, request, data=None):
-    url = f"{settings.API_BASE_URL}/{endpoint.lstrip('/')}"
+from .transports import ApiError, get_transport
+
+# Заголовки, токен и тело запроса в журнал не попадают
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    LRU-кэш GET-ответов API в памяти процесса: ключ -> (ETag, тело ответа).
+    Повторный запрос отправляется с If-None-Match; на 304 тело берется из кэша.
+    """
+
+    def __init__(self, maxsize=500):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, etag, content):
+        with self.lock:
+            self.entries[key] = (etag, content)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+response_cache = ResponseCache(**getattr(settings, 'API_RESPONSE_CACHE', {}))
+
+
+def prepare_api_request(method, endpoint, request, token):
     headers = {}
-    token = request.session.get('api_token')
     if token:
         headers['Authorization'] = f"Token {token}"
-    print(f"API request: {method} {url}, Data: {data}, Headers: {headers}, Session token: {token}")
+    cache_key = cached = None
+    if method == 'GET':
+        # Ответ зависит от пользователя (права) и хоста (абсолютные URL).
+        cache_key = (request.get_host(), token, endpoint)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            headers['If-None-Match'] = cached[0]
+    return headers, cache_key, cached
+
+
+def finish_api_request(response, cache_key, cached):
+    logger.debug("API response: %s", response.status_code)
+    if response.status_code == 304 and cached is not None:
+        response_cache.record(hit=True)
+        response.content = cached[1]
+    elif response.status_code >= 400:
+        logger.debug("API request failed: HTTPError %s %s", response.status_code, response.content[:500])
+        return None
+    elif cache_key is not None:
+        response_cache.record(hit=False)
+        if response.headers.get('ETag'):
+            response_cache.set(cache_key, response.headers['ETag'], response.content)
+    return response.json()
+
+
+def api_request(method, endpoint, request, data=None, files=None):
+    token = request.session.get('api_token')
+    headers, cache_key, cached = prepare_api_request(method, endpoint, request, token)
+    transport = get_transport()
+    logger.debug("API request: %s %s via %s", method, endpoint, transport.__class__.__name__)
     try:
-        response = requests.request(method, url, headers=headers, json=data, timeout=5)
-        print(f"API response: {response.status_code} {response.text}")
-        response.raise_for_status()
-        return response.json() if response.content else None
-    except requests.Timeout:
-        print(f"API request failed: Timeout for {method} {url}")
+        response = transport.request(method, endpoint, headers, data=data, files=files, request=request)
+    except ApiError as e:
+        logger.debug("API request failed: %s", e)
         return None
-    except requests.HTTPError as e:
-        print(f"API request failed: HTTPError {e.response.status_code} {e.response.text}")
+    return finish_api_request(response, cache_key, cached)
+
+
+async def aapi_request(method, endpoint, request, data=None, files=None):
+    """api_request для асинхронных представлений (transport.arequest)."""
+    token = await request.session.aget('api_token')
+    headers, cache_key, cached = prepare_api_request(method, endpoint, request, token)
+    transport = get_transport()
+    logger.debug("API request (async): %s %s via %s", method, endpoint, transport.__class__.__name__)
+    try:
+        response = await transport.arequest(method, endpoint, headers, data=data, files=files, request=request)
+    except ApiError as e:
+        logger.debug("API request failed: %s", e)
         return None
-    except requests.RequestException as e:
-        print(f"API request failed: {e}")
-        return None
\ No newline at end of file
+    return finish_api_request(response, cache_key, cached)
+
+
+async def api_gather(request, *endpoints):
+    """
+    GET нескольких независимых эндпоинтов одновременно; результаты — в порядке
+    endpoints (None для неудачных, как у api_request). Время — как у самого
+    медленного вызова, а не их сумма.
+    """
+    # Сессия загружается один раз до запуска, а не в каждом вызове
+    await request.session.aget('api_token')
+    return await asyncio.gather(*(aapi_request('GET', endpoint, request) for endpoint in endpoints))
@@ -1,3 +1,4 @@
+from django.views import View
 from django.views.generic import TemplateView, ListView, CreateView, UpdateView, DeleteView
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy
@@ -7,27 +8,91 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.forms import AuthenticationForm
-from django.http import Http404
-from .forms import CategoryForm, ProductForm, CustomerForm, OrderForm, ReviewForm, ManufacturerForm, RegisterForm
-from .utils import api_request
-import requests
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse
+from django.template.response import TemplateResponse
+from urllib.parse import parse_qs, urlencode, urlparse
+from .forms import CategoryForm, ProductForm, CustomerForm, OrderForm, ReviewForm, ManufacturerForm, RegisterForm, aload_autocomplete_labels, parse_choices
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.decorators import method_decorator
+from .utils import aapi_request, api_gather, api_request
+from .cart import Cart
+from .cache import cache_catalog_page, catalog_cache_key, catalog_version
 
 class AdminRequiredMixin(UserPassesTestMixin):
     def test_func(self):
         return self.request.user.is_authenticated and self.request.user.is_staff
 
+class AsyncAdminView(View):
+    """
+    Асинхронная страница админки: независимые вызовы API идут одновременно
+    (api_gather), и страница ждет самый медленный из них, а не их сумму.
+    Рассчитана на ASGI-сервер (shop/asgi.py); под WSGI тоже работает, но каждый
+    запрос получает свой цикл событий. Права — как у AdminRequiredMixin.
+    """
+    template_name = None
+    success_url = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not (user.is_authenticated and user.is_staff):
+            if user.is_authenticated:
+                raise PermissionDenied
+            return redirect_to_login(request.get_full_path())
+        return await super().dispatch(request, *args, **kwargs)
+
+    def render(self, **context):
+        # TemplateResponse рендерится обработчиком Django (в потоке, через sync_to_async)
+        return TemplateResponse(self.request, self.template_name, {'view': self, **context})
+
+def cursor_from_link(link):
+    # Из ссылки next/previous API достается только значение cursor.
+    if not link:
+        return None
+    return parse_qs(urlparse(link).query).get('cursor', [None])[0]
+
+class CursorPageMixin:
+    # Списки админки листаются курсорной пагинацией API: без COUNT(*) и OFFSET.
+    cursor_pagination = None
+
+    def cursor_page_endpoint(self, endpoint, **params):
+        params['pagination'] = 'cursor'
+        cursor = self.request.GET.get('cursor')
+        if cursor:
+            params['cursor'] = cursor
+        return f'{endpoint}?{urlencode(params)}'
+
+    def fetch_cursor_page(self, endpoint, **params):
+        return self.read_cursor_page(api_request('GET', self.cursor_page_endpoint(endpoint, **params), self.request))
+
+    def read_cursor_page(self, data):
+        if not data:
+            return []
+        self.cursor_pagination = {
+            'next': cursor_from_link(data.get('next')),
+            'previous': cursor_from_link(data.get('previous')),
+        }
+        return data['results']
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['cursor_pagination'] = self.cursor_pagination
+        return context
+
 class AdminMenuView(AdminRequiredMixin, TemplateView):
     template_name = 'admin_menu.html'
 
-class CategoryListView(AdminRequiredMixin, ListView):
+class CategoryListView(AdminRequiredMixin, CursorPageMixin, ListView):
     template_name = 'category_crud.html'
     context_object_name = 'categories'
 
     def get_queryset(self):
         print(f"CategoryListView: User: {self.request.user}, Is staff: {self.request.user.is_staff}")
-        data = api_request('GET', 'categories/', self.request)
+        data = self.fetch_cursor_page('categories/')
         print(f"CategoryListView: API response: {data}")
-        return data['results'] if data else []
+        return data
 class CategoryCreateView(AdminRequiredMixin, CreateView):
     template_name = 'category_form.html'
     form_class = CategoryForm
@@ -51,32 +116,39 @@ class CategoryCreateView(AdminRequiredMixin, CreateView):
         messages.error(self.request, 'Ошибка создания категории.')
         return self.form_invalid(form)
 
-class ProductCreateView(AdminRequiredMixin, CreateView):
+class ProductFormMixin:
     template_name = 'product_form.html'
-    form_class = ProductForm
     success_url = reverse_lazy('product_crud')
-
-    def get_form_kwargs(self):
-        kwargs = super().get_form_kwargs()
-        kwargs['request'] = self.request
-        if 'instance' in kwargs:
-            del kwargs['instance']
-        return kwargs
-
-    def form_valid(self, form):
+    # Справочники для выпадающих списков; запрашиваются вместе с остальными данными страницы
+    choice_endpoints = ('categories/choices/', 'manufacturers/choices/')
+
+    def get_form(self, categories, manufacturers, **kwargs):
+        if self.request.method == 'POST':
+            kwargs.update(data=self.request.POST, files=self.request.FILES)
+        return ProductForm(categories=parse_choices(categories), manufacturers=parse_choices(manufacturers), **kwargs)
+
+class ProductCreateView(ProductFormMixin, AsyncAdminView):
+    async def get(self, request):
+        form = self.get_form(*await api_gather(request, *self.choice_endpoints))
+        return self.render(form=form)
+
+    async def post(self, request):
+        form = self.get_form(*await api_gather(request, *self.choice_endpoints))
+        if not form.is_valid():
+            return self.render(form=form)
         print(f"ProductCreateView: Form data: {form.cleaned_data}")
         data = form.cleaned_data.copy()
         files = None
         if 'main_image' in data and data['main_image']:
             files = {'main_image': (data['main_image'].name, data['main_image'].file, data['main_image'].content_type)}
             del data['main_image']  # Удаляем main_image из data, так как оно отправляется как файл
-        response = api_request('POST', 'products/', self.request, data=data, files=files)
+        response = await aapi_request('POST', 'products/', request, data=data, files=files)
         print(f"ProductCreateView: API response: {response}")
         if response:
-            messages.success(self.request, 'Продукт создан.')
+            messages.success(request, 'Продукт создан.')
             return redirect(self.success_url)
-        messages.error(self.request, 'Ошибка создания продукта.')
-        return self.form_invalid(form)
+        messages.error(request, 'Ошибка создания продукта.')
+        return self.render(form=form)
 class CategoryUpdateView(AdminRequiredMixin, UpdateView):
     template_name = 'category_form.html'
     form_class = CategoryForm
@@ -125,57 +197,38 @@ class CategoryDeleteView(AdminRequiredMixin, DeleteView):
             messages.error(request, 'Ошибка удаления категории.')
         return redirect(self.success_url)
 
-class ProductListView(AdminRequiredMixin, ListView):
+class ProductListView(CursorPageMixin, AsyncAdminView):
     template_name = 'product_crud.html'
-    context_object_name = 'products'
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        manufacturers_data = api_request('GET', 'manufacturers/', self.request)
-        context['manufacturers'] = manufacturers_data['results'] if manufacturers_data else []
-        print(f"ProductListView: User: {self.request.user}, Is staff: {self.request.user.is_staff}")
-        print(f"ProductListView: Manufacturers: {context['manufacturers']}")
-        return context
 
-    def get_queryset(self):
-        print(f"ProductListView: Fetching products")
-        data = api_request('GET', 'products/', self.request)
-        print(f"ProductListView: API response: {data}")
-        return data['results'] if data else []
+    async def get(self, request):
+        data, manufacturers_data = await api_gather(request, self.cursor_page_endpoint('products/'), 'manufacturers/')
+        products = self.read_cursor_page(data)
+        manufacturers = manufacturers_data['results'] if manufacturers_data else []
+        return self.render(products=products, manufacturers=manufacturers, cursor_pagination=self.cursor_pagination)
 
 
-class ProductUpdateView(AdminRequiredMixin, UpdateView):
-    template_name = 'product_form.html'
-    form_class = ProductForm
-    success_url = reverse_lazy('product_crud')
-
-    def get_object(self):
-        slug = self.kwargs['slug']
-        data = api_request('GET', f'products/?slug={slug}', self.request)
+class ProductUpdateView(ProductFormMixin, AsyncAdminView):
+    async def get_form_with_object(self, slug):
+        # Товар и оба справочника — одновременно
+        data, categories, manufacturers = await api_gather(self.request, f'products/?slug={slug}', *self.choice_endpoints)
         if not data or not data['results']:
             raise Http404
-        return data['results'][0]
+        product = data['results'][0]
+        return self.get_form(categories, manufacturers, initial=product, instance=product)
 
-    def get_form_kwargs(self):
-        kwargs = super().get_form_kwargs()
-        kwargs['request'] = self.request
-        return kwargs
-
-    def get_initial(self):
-        return self.get_object()
+    async def get(self, request, slug):
+        return self.render(form=await self.get_form_with_object(slug))
 
-    def form_valid(self, form):
-        slug = self.kwargs['slug']
-        product_data = api_request('GET', f'products/?slug={slug}', self.request)
-        if not product_data or not product_data['results']:
-            raise Http404
-        product_id = product_data['results'][0]['id']
-        response = api_request('PATCH', f'products/{product_id}/', self.request, data=form.cleaned_data)
+    async def post(self, request, slug):
+        form = await self.get_form_with_object(slug)
+        if not form.is_valid():
+            return self.render(form=form)
+        response = await aapi_request('PATCH', f"products/{form.instance['id']}/", request, data=form.cleaned_data)
         if response:
-            messages.success(self.request, 'Продукт обновлен.')
+            messages.success(request, 'Продукт обновлен.')
             return redirect(self.success_url)
-        messages.error(self.request, 'Ошибка обновления продукта.')
-        return self.form_invalid(form)
+        messages.error(request, 'Ошибка обновления продукта.')
+        return self.render(form=form)
 
 class ProductDeleteView(AdminRequiredMixin, DeleteView):
     success_url = reverse_lazy('product_crud')
@@ -251,15 +304,15 @@ class ManufacturerDeleteView(AdminRequiredMixin, DeleteView):
             messages.error(request, 'Ошибка удаления производителя.')
         return redirect(self.success_url)
 
-class CustomerListView(AdminRequiredMixin, ListView):
+class CustomerListView(AdminRequiredMixin, CursorPageMixin, ListView):
     template_name = 'customer_crud.html'
     context_object_name = 'customers'
 
     def get_queryset(self):
         print(f"CustomerListView: User: {self.request.user}, Is staff: {self.request.user.is_staff}")
-        data = api_request('GET', 'customers/', self.request)
+        data = self.fetch_cursor_page('customers/')
         print(f"CustomerListView: API response: {data}")
-        return data['results'] if data else []
+        return data
 
 class CustomerCreateView(AdminRequiredMixin, CreateView):
     template_name = 'customer_form.html'
@@ -318,15 +371,16 @@ class CustomerDeleteView(AdminRequiredMixin, DeleteView):
             messages.error(request, 'Ошибка удаления покупателя.')
         return redirect(self.success_url)
 
-class OrderListView(AdminRequiredMixin, ListView):
+class OrderListView(AdminRequiredMixin, CursorPageMixin, ListView):
     template_name = 'order_crud.html'
     context_object_name = 'orders'
 
     def get_queryset(self):
         print(f"OrderListView: User: {self.request.user}, Is staff: {self.request.user.is_staff}")
-        data = api_request('GET', 'orders/', self.request)
+        # Покупатель и сумма приходят вместе с заказом, без запроса на каждую строку
+        data = self.fetch_cursor_page('orders/', expand='customer')
         print(f"OrderListView: API response: {data}")
-        return data['results'] if data else []
+        return data
 
 class OrderCreateView(AdminRequiredMixin, CreateView):
     template_name = 'order_form.html'
@@ -391,66 +445,62 @@ class OrderDeleteView(AdminRequiredMixin, DeleteView):
             messages.error(request, 'Ошибка удаления заказа.')
         return redirect(self.success_url)
 
-class ReviewListView(AdminRequiredMixin, ListView):
+class ReviewListView(AdminRequiredMixin, CursorPageMixin, ListView):
     template_name = 'review_crud.html'
     context_object_name = 'reviews'
 
     def get_queryset(self):
         print(f"ReviewListView: User: {self.request.user}, Is staff: {self.request.user.is_staff}")
-        data = api_request('GET', 'reviews/', self.request)
+        data = self.fetch_cursor_page('reviews/')
         print(f"ReviewListView: API response: {data}")
-        return data['results'] if data else []
+        return data
 
-class ReviewCreateView(AdminRequiredMixin, CreateView):
+class ReviewCreateView(AsyncAdminView):
     template_name = 'review_form.html'
-    form_class = ReviewForm
     success_url = reverse_lazy('review_crud')
 
-    def get_form_kwargs(self):
-        kwargs = super().get_form_kwargs()
-        kwargs['request'] = self.request
-        if 'instance' in kwargs:
-            del kwargs['instance']  # Удаляем instance
-        return kwargs
+    async def get(self, request):
+        return self.render(form=ReviewForm())
 
-    def form_valid(self, form):
-        print(f"ReviewCreateView: Form data: {form.cleaned_data}")
-        response = api_request('POST', 'reviews/', self.request, data=form.cleaned_data)
-        print(f"ReviewCreateView: API response: {response}")
-        if response:
-            messages.success(self.request, 'Отзыв создан.')
-            return redirect(self.success_url)
-        messages.error(self.request, 'Ошибка создания отзыва.')
-        return self.form_invalid(form)
+    async def post(self, request):
+        form = ReviewForm(request.POST)
+        if form.is_valid():
+            response = await aapi_request('POST', 'reviews/', request, data=form.cleaned_data)
+            if response:
+                messages.success(request, 'Отзыв создан.')
+                return redirect(self.success_url)
+            messages.error(request, 'Ошибка создания отзыва.')
+        # Подписи товара и покупателя для повторного показа — одновременно
+        await aload_autocomplete_labels(form, request)
+        return self.render(form=form)
 
-class ReviewUpdateView(AdminRequiredMixin, UpdateView):
+class ReviewUpdateView(AsyncAdminView):
     template_name = 'review_form.html'
-    form_class = ReviewForm
     success_url = reverse_lazy('review_crud')
 
-    def get_object(self):
-        pk = self.kwargs['pk']
-        data = api_request('GET', f'reviews/{pk}/', self.request)
+    async def get_object(self, pk):
+        data = await aapi_request('GET', f'reviews/{pk}/', self.request)
         if not data:
             raise Http404
         return data
 
-    def get_form_kwargs(self):
-        kwargs = super().get_form_kwargs()
-        kwargs['request'] = self.request
-        return kwargs
+    async def get(self, request, pk):
+        review = await self.get_object(pk)
+        form = ReviewForm(initial=review, instance=review)
+        await aload_autocomplete_labels(form, request)
+        return self.render(form=form)
 
-    def get_initial(self):
-        return self.get_object()
-
-    def form_valid(self, form):
-        pk = self.kwargs['pk']
-        response = api_request('PATCH', f'reviews/{pk}/', self.request, data=form.cleaned_data)
-        if response:
-            messages.success(self.request, 'Отзыв обновлен.')
-            return redirect(self.success_url)
-        messages.error(self.request, 'Ошибка обновления отзыва.')
-        return self.form_invalid(form)
+    async def post(self, request, pk):
+        review = await self.get_object(pk)
+        form = ReviewForm(request.POST, initial=review, instance=review)
+        if form.is_valid():
+            response = await aapi_request('PATCH', f'reviews/{pk}/', request, data=form.cleaned_data)
+            if response:
+                messages.success(request, 'Отзыв обновлен.')
+                return redirect(self.success_url)
+            messages.error(request, 'Ошибка обновления отзыва.')
+        await aload_autocomplete_labels(form, request)
+        return self.render(form=form)
 
 class ReviewDeleteView(AdminRequiredMixin, DeleteView):
     success_url = reverse_lazy('review_crud')
@@ -557,13 +607,6 @@ def custom_login(request):
             print(f"custom_login: Username: {username}")
             api_data = {'username': username, 'password': password}
             print(f"custom_login: API request data: {api_data}")
-            try:
-                api_response = requests.post('http://127.0.0.1:8000/api/auth/login/', json=api_data)
-                print(f"custom_login: API response: {api_response.status_code} {api_response.text}")
-                response_data = api_response.json()
-            except Exception as e:
-                print(f"custom_login: API request error: {str(e)}")
-                response_data = None
             response = api_request('POST', 'auth/login/', request, data=api_data)
             print(f"custom_login: api_request response: {response}")
             if response and 'token' in response:
@@ -585,11 +628,15 @@ def custom_login(request):
     return render(request, 'login.html', {'form': form})
 
 def custom_logout(request):
+    # Токен API отзывается на стороне API (удаляется из БД), иначе он оставался бы действующим
+    if request.session.get('api_token'):
+        api_request('POST', 'auth/logout/', request)
     logout(request)
     request.session.flush()
     messages.success(request, 'Вы успешно вышли из аккаунта.')
     return redirect('login')
 
+@method_decorator(cache_catalog_page, name='dispatch')
 class AllProductsView(TemplateView):
     template_name = 'all_products.html'
 
@@ -598,42 +645,32 @@ class AllProductsView(TemplateView):
         search_query = self.request.GET.get('search', '')
         page_size = self.request.GET.get('page_size', 10)
         page = self.request.GET.get('page', 1)
-        params = f'?page={page}&page_size={page_size}'
-        if search_query:
-            params += f'&search={search_query}'
-        print(f"AllProductsView: Fetching products with params: {params}")
-        products_data = api_request('GET', f'products/{params}', self.request)
-        print(f"AllProductsView: API response: {products_data}")
-        context['products'] = products_data.get('results', []) if products_data else []
-        context['search_query'] = search_query
-        context['page_size'] = page_size
-        total_count = products_data.get('count', 0) if products_data else 0
-        total_pages = (total_count + int(page_size) - 1) // int(page_size)
-        current_page = int(page)
-        range_start = max(1, current_page - 2)
-        range_end = min(total_pages + 1, current_page + 3)
-        context['pagination'] = {
-            'count': total_count,
-            'next': products_data.get('next') if products_data else None,
-            'previous': products_data.get('previous') if products_data else None,
-            'current_page': current_page,
-            'range_pages': range(range_start, range_end),
-        }
-        return context   
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        search_query = self.request.GET.get('search', '')
-        page_size = self.request.GET.get('page_size', 10)
-        page = self.request.GET.get('page', 1)
-        params = f'?page={page}&page_size={page_size}'
+        # ?pagination=cursor — листание без COUNT(*) и OFFSET для глубоких страниц
+        cursor_mode = self.request.GET.get('pagination') == 'cursor'
+        if cursor_mode:
+            params = {'pagination': 'cursor', 'page_size': page_size}
+            if self.request.GET.get('cursor'):
+                params['cursor'] = self.request.GET['cursor']
+        else:
+            params = {'page': page, 'page_size': page_size}
         if search_query:
-            params += f'&search={search_query}'
+            params['search'] = search_query
         print(f"AllProductsView: Fetching products with params: {params}")
-        products_data = api_request('GET', f'products/{params}', self.request)
+        products_data = catalog_api_request(self.request, f'products/?{urlencode(params)}')
         print(f"AllProductsView: API response: {products_data}")
         context['products'] = products_data.get('results', []) if products_data else []
         context['search_query'] = search_query
         context['page_size'] = page_size
+        if cursor_mode:
+            query = {'pagination': 'cursor', 'page_size': page_size}
+            if search_query:
+                query['search'] = search_query
+            context['cursor_pagination'] = {
+                'next': cursor_from_link(products_data.get('next')) if products_data else None,
+                'previous': cursor_from_link(products_data.get('previous')) if products_data else None,
+                'query': '&' + urlencode(query),
+            }
+            return context
         total_count = products_data.get('count', 0) if products_data else 0
         total_pages = (total_count + int(page_size) - 1) // int(page_size)
         current_page = int(page)
@@ -647,11 +684,9 @@ class AllProductsView(TemplateView):
             'range_pages': range(range_start, range_end),
         }
         return context
+
 def home(request):
-    print("home: Fetching popular products")
-    popular_products_data = api_request('GET', 'products/?ordering=-stock&page_size=3', request)
-    print(f"home: API response: {popular_products_data}")
-    popular_products = popular_products_data['results'] if popular_products_data else []
+    popular_products = api_request('GET', 'products/popular/?limit=3', request) or []
     return render(request, 'home.html', {'popular_products': popular_products})
 
 def about(request):
@@ -666,46 +701,74 @@ def find_us(request):
 def products(request):
     return render(request, 'products.html')
 
+def catalog_api_request(request, endpoint):
+    # Данные витрины кэшируются под версией каталога: повторные страницы
+    # (в том числе для вошедших пользователей) не обращаются к API.
+    key = catalog_cache_key('catalog_api', catalog_version(request), request, endpoint)
+    data = cache.get(key)
+    if data is None:
+        data = api_request('GET', endpoint, request)
+        if data is not None:
+            cache.set(key, data, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 600))
+    return data
+
+@cache_catalog_page
 def categories(request):
     print("categories: Fetching categories")
-    categories_data = api_request('GET', 'categories/', request)
+    categories_data = catalog_api_request(request, 'categories/')
     print(f"categories: API response: {categories_data}")
     categories = categories_data['results'] if categories_data else []
     return render(request, 'categories.html', {'categories': categories})
 
+@cache_catalog_page
 def category_products(request, slug):
     print(f"category_products: Fetching category with slug: {slug}")
-    category_data = api_request('GET', f'categories/?slug={slug}', request)
+    category_data = catalog_api_request(request, f'categories/?slug={slug}')
     print(f"category_products: Category API response: {category_data}")
     if not category_data or not category_data['results']:
         raise Http404
     category = category_data['results'][0]
-    products_data = api_request('GET', f'products/?category={category["id"]}', request)
+    products_data = catalog_api_request(request, f'products/?category={category["id"]}')
     print(f"category_products: Products API response: {products_data}")
     products = products_data['results'] if products_data else []
     return render(request, 'category_products.html', {'category': category, 'products': products})
 
+AUTOCOMPLETE_SOURCES = ('customers', 'products')
+
+@login_required
+def autocomplete(request, source):
+    # Подсказки для AutocompleteField: проксируются к API с токеном пользователя
+    if source not in AUTOCOMPLETE_SOURCES or not request.user.is_staff:
+        raise Http404
+    query = request.GET.get('q', '')
+    data = api_request('GET', f'{source}/autocomplete/?{urlencode({"q": query})}', request)
+    return JsonResponse(data or [], safe=False)
+
+def fetch_products(request, product_ids):
+    # Все нужные товары одним запросом к API: {'<id>': product}
+    if not product_ids:
+        return {}
+    ids = ','.join(str(product_id) for product_id in product_ids)
+    products_data = api_request('GET', f'products/?ids={ids}', request)
+    return {str(product['id']): product for product in products_data} if products_data else {}
+
 def cart(request):
     if not request.user.is_authenticated:
         messages.error(request, 'Пожалуйста, авторизуйтесь для просмотра корзины.')
         return redirect('login')
     
-    cart = request.session.get('cart', {})
-    product_ids = list(cart.keys())
+    cart = Cart(request)
+    product_ids = cart.product_ids()
     if not product_ids:
         return render(request, 'cart.html', {'cart_items': [], 'total_price': 0})
     
-    print(f"cart: Fetching products with IDs: {product_ids}")
-    products_data = api_request('GET', f'products/?ids={",".join(product_ids)}', request)
-    print(f"cart: API response: {products_data}")
-    products = products_data['results'] if products_data else []
+    products = fetch_products(request, product_ids)
     
     cart_items = []
     total_price = 0
-    for product in products:
-        product_id = str(product['id'])
-        if product_id in cart:
-            quantity = cart[product_id]
+    for product_id, quantity in cart:
+        product = products.get(product_id)
+        if product:
             subtotal = float(product['price']) * quantity
             total_price += subtotal
             cart_items.append({
@@ -718,16 +781,13 @@ def cart(request):
 @login_required
 def add_to_cart(request, product_id):
     print(f"add_to_cart: Fetching product with ID: {product_id}")
-    product_data = api_request('GET', f'products/{product_id}/', request)
+    product_data = fetch_products(request, [product_id]).get(str(product_id))
     print(f"add_to_cart: API response: {product_data}")
     if not product_data or product_data['stock'] < 1:
         messages.error(request, 'Товара нет в наличии.')
         return redirect('all_products')
     
-    cart = request.session.get('cart', {})
-    cart[str(product_id)] = cart.get(str(product_id), 0) + 1
-    request.session['cart'] = cart
-    request.session.modified = True
+    Cart(request).add(product_id)
     messages.success(request, f"{product_data['name']} добавлен в корзину.")
     return redirect('cart')
 
@@ -735,7 +795,7 @@ def add_to_cart(request, product_id):
 def update_cart(request, product_id):
     if request.method == 'POST':
         print(f"update_cart: Fetching product with ID: {product_id}")
-        product_data = api_request('GET', f'products/{product_id}/', request)
+        product_data = fetch_products(request, [product_id]).get(str(product_id))
         print(f"update_cart: API response: {product_data}")
         if not product_data:
             messages.error(request, 'Товар не найден.')
@@ -748,75 +808,35 @@ def update_cart(request, product_id):
             messages.error(request, f'Недостаточно товара {product_data["name"]} на складе.')
             return redirect('cart')
         
-        cart = request.session.get('cart', {})
-        cart[str(product_id)] = quantity
-        request.session['cart'] = cart
-        request.session.modified = True
+        Cart(request).set(product_id, quantity)
         messages.success(request, f'Количество товара {product_data["name"]} обновлено.')
         return redirect('cart')
     return redirect('cart')
 
 @login_required
 def remove_from_cart(request, product_id):
-    cart = request.session.get('cart', {})
-    if str(product_id) in cart:
-        del cart[str(product_id)]
-        request.session['cart'] = cart
-        request.session.modified = True
+    cart = Cart(request)
+    if product_id in cart:
+        cart.remove(product_id)
         messages.success(request, 'Товар удален из корзины.')
     return redirect('cart')
 
 @login_required
 def create_order(request):
-    cart = request.session.get('cart', {})
+    cart = Cart(request)
     if not cart:
         messages.error(request, 'Корзина пуста.')
         return redirect('cart')
     
-    print(f"create_order: Fetching customer with email: {request.user.email}")
-    customer_data = api_request('GET', f'customers/?email={request.user.email}', request)
-    print(f"create_order: Customer API response: {customer_data}")
-    if not customer_data or not customer_data['results']:
-        messages.error(request, 'Пожалуйста, обновите данные профиля.')
-        return redirect('cart')
-    customer_id = customer_data['results'][0]['id']
-
-    order_data = {'customer': customer_id, 'status': 'pending'}
-    print(f"create_order: Creating order with data: {order_data}")
-    order_response = api_request('POST', 'orders/', request, data=order_data)
-    print(f"create_order: Order API response: {order_response}")
+    items = [{'product': int(product_id), 'quantity': quantity} for product_id, quantity in cart]
+    order_response = api_request('POST', 'checkout/', request, data={'items': items})
     if not order_response:
-        messages.error(request, 'Ошибка создания заказа.')
+        messages.error(request, 'Ошибка создания заказа: проверьте наличие товаров и данные профиля.')
         return redirect('cart')
-    
     order_id = order_response['id']
-    total_price = 0
-    for product_id, quantity in cart.items():
-        print(f"create_order: Fetching product with ID: {product_id}")
-        product_data = api_request('GET', f'products/{product_id}/', request)
-        print(f"create_order: Product API response: {product_data}")
-        if not product_data or product_data['stock'] < quantity:
-            messages.error(request, f'Недостаточно товара {product_data["name"]} на складе.')
-            api_request('DELETE', f'orders/{order_id}/', request)
-            return redirect('cart')
-        
-        subtotal = float(product_data['price']) * quantity
-        order_item_data = {
-            'order': order_id,
-            'product': product_id,
-            'quantity': quantity,
-            'price': subtotal
-        }
-        print(f"create_order: Creating order item with data: {order_item_data}")
-        api_request('POST', 'order-items/', request, data=order_item_data)
-        
-        product_update_data = {'stock': product_data['stock'] - quantity}
-        print(f"create_order: Updating product stock with data: {product_update_data}")
-        api_request('PATCH', f'products/{product_id}/', request, data=product_update_data)
-        total_price += subtotal
-    
-    del request.session['cart']
-    request.session.modified = True
+    total_price = order_response['total']
+
+    cart.clear()
     messages.success(request, f'Заказ #{order_id} успешно создан. Общая сумма: {total_price} руб.')
     return redirect('home')
 def custom_404(request, exception):